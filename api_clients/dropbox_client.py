@@ -1,6 +1,9 @@
 """Dropbox client wrapper for downloading and uploading files."""
 
+import hashlib
+import json
 import string
+from pathlib import Path
 
 import dropbox
 from dropbox.exceptions import ApiError
@@ -8,21 +11,44 @@ from dropbox.files import WriteMode
 from loguru import logger
 
 from api_clients.client import Client
+from run_metrics import count_bytes
+
+CONTENT_HASH_BLOCK_SIZE = 4 * 1024 * 1024
+
+
+def content_hash(data: bytes) -> str:
+    """Compute the Dropbox content hash of in-memory file bytes.
+
+    SHA-256 over the concatenated SHA-256 digests of 4 MB blocks, as
+    documented for ``FileMetadata.content_hash``.
+    """
+    block_hashes = b"".join(
+        hashlib.sha256(data[i : i + CONTENT_HASH_BLOCK_SIZE]).digest()
+        for i in range(0, len(data), CONTENT_HASH_BLOCK_SIZE)
+    )
+    return hashlib.sha256(block_hashes).hexdigest()
 
 
 class DropboxClient(Client):
-    """Light wrapper over the Dropbox SDK used by the pipeline."""
+    """Light wrapper over the Dropbox SDK used by the pipeline.
+
+    With a ``cache_dir`` the last downloaded or uploaded revision of each file
+    is kept locally and reused while Dropbox reports the same ``rev`` and
+    ``content_hash``, so unchanged files cost only a metadata call.
+    """
 
     _api_key: string = None
     _dbx: dropbox.Dropbox = None
+    _cache_dir: Path = None
 
     def login(self):
         pass
 
-    def __init__(self, api_key: string):
+    def __init__(self, api_key: string, cache_dir: Path = None):
         """Initialize Dropbox SDK client with the given API key."""
         self._api_key = api_key
         self._dbx = dropbox.Dropbox(self._api_key)
+        self._cache_dir = cache_dir
 
     @property
     def api_key(self):
@@ -30,10 +56,70 @@ class DropboxClient(Client):
         return self._api_key
 
     def retrieve_file(self, file_path: string) -> bytes:
-        """Download a file from Dropbox and return its bytes."""
+        """Return file bytes, downloading only when the cached copy is stale."""
+        if self._cache_dir is None:
+            metadata, res = self._dbx.files_download(path=file_path)
+            count_bytes(received=len(res.content))
+            return res.content
+        cached = self._read_cache(file_path)
+        if cached is not None:
+            try:
+                remote = self._dbx.files_get_metadata(file_path)
+            except ApiError as err:
+                logger.warning(f"Dropbox metadata lookup failed: {err}")
+            else:
+                meta, data = cached
+                if (
+                    meta["rev"] == remote.rev
+                    and meta["content_hash"] == remote.content_hash
+                ):
+                    logger.info(f"Dropbox cache hit for {file_path} (rev {remote.rev})")
+                    return data
         metadata, res = self._dbx.files_download(path=file_path)
+        count_bytes(received=len(res.content))
+        self._write_cache(file_path, metadata, res.content)
         return res.content
 
+    def _cache_paths(self, file_path: string) -> tuple[Path, Path]:
+        """Return (data, metadata) cache file paths for a Dropbox path."""
+        key = hashlib.sha1(file_path.lower().encode("utf-8")).hexdigest()
+        return self._cache_dir / f"{key}.bin", self._cache_dir / f"{key}.json"
+
+    def _read_cache(self, file_path: string) -> tuple[dict, bytes] | None:
+        """Return cached (metadata, bytes) if present and not corrupted."""
+        data_path, meta_path = self._cache_paths(file_path)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            data = data_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        if content_hash(data) != meta.get("content_hash"):
+            logger.warning(f"Dropbox cache for {file_path} is corrupted, ignoring")
+            return None
+        return meta, data
+
+    def _write_cache(self, file_path: string, metadata, data: bytes):
+        """Store file bytes with the revision they correspond to."""
+        if self._cache_dir is None:
+            return
+        data_path, meta_path = self._cache_paths(file_path)
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            # metadata last: a partial write leaves a hash mismatch, not a hit
+            data_path.write_bytes(data)
+            meta_path.write_text(
+                json.dumps(
+                    {
+                        "path": file_path,
+                        "rev": metadata.rev,
+                        "content_hash": metadata.content_hash,
+                    }
+                ),
+                encoding="utf-8",
+            )
+        except OSError as err:
+            logger.warning(f"Cannot write Dropbox cache: {err}")
+
     def commit_file(self, file_path_loc: string, file_path: string):
         """Upload a local file to Dropbox path (overwrite)."""
         with open(file_path_loc, 'rb') as f:
@@ -45,7 +131,11 @@ class DropboxClient(Client):
     def commit_file_bytes(self, file_local: bytes, file_path: string):
         """Upload bytes to Dropbox path. Returns True on success."""
         try:
-            self._dbx.files_upload(file_local, file_path, mode=WriteMode('overwrite'))
+            metadata = self._dbx.files_upload(
+                file_local, file_path, mode=WriteMode('overwrite')
+            )
+            count_bytes(sent=len(file_local))
+            self._write_cache(file_path, metadata, file_local)
             return True
         except ApiError as err:
             # This checks for the specific error where a user doesn't have
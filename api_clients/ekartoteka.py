@@ -1,15 +1,28 @@
 """REST client for e-kartoteka API used to fetch monthly fees."""
 
-import codecs
 import json
+import threading
+import time
 from base64 import b64decode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from json import JSONDecodeError
 from typing import NamedTuple
-from urllib import request
-from urllib.error import URLError
+from urllib.error import HTTPError, URLError
+
+import requests
+from loguru import logger
 
 from api_clients.client import Client, NotInitializedError
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport, default_transport
+from run_metrics import in_current_context
+
+SESSION_PORTAL = "ekartoteka"
+# a cached token is renewed this many seconds before it expires
+TOKEN_EXPIRY_MARGIN = 300
+# fees, settlements and update stamps are fetched at the same time
+PARALLEL_REQUESTS = 3
 
 
 def seconds_from_epoch() -> int:
@@ -51,7 +64,7 @@ class Ekartoteka(Client):
         "}&id_kli={} "
     )
     URL_UPDATE_DATES = "https://e-kartoteka.pl/api/uzytkownicy/datyaktualizacji/?id_a_do={}&id_kli={}&pageSize=50"
-    token: str
+    token: str = None
     _credentials = None
     user_full_name: str = None
     user_email: str = None
@@ -59,21 +72,52 @@ class Ekartoteka(Client):
     client_id: int
     token_expire: int
 
-    def __init__(self, credentials):
-        """Store credentials dict as provided by settings."""
+    def __init__(
+        self,
+        credentials,
+        session_store: SessionStore = None,
+        transport: Transport = None,
+    ):
+        """Store credentials dict as provided by settings.
+
+        With a ``session_store`` the token and account ids of the last login
+        are reused until shortly before the token expires. Requests go
+        through ``transport``, the shared one by default.
+        """
         self._credentials = credentials
         self._logged_in: bool = False
+        self._session_store = session_store
+        self._cached_token: str | None = None
+        self._login_lock = threading.Lock()
+        # keep-alive connections to the API host come from the shared transport
+        self._session = (transport or default_transport()).session()
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request over the pooled session.
+
+        Failures are raised as ``urllib.error`` exceptions, which callers
+        already handle.
+        """
+        try:
+            response = self._session.request(method, url, **kwargs)
+            response.raise_for_status()
+        except requests.HTTPError as err:
+            raise HTTPError(
+                url, err.response.status_code, str(err), err.response.headers, None
+            ) from err
+        except requests.RequestException as err:
+            raise URLError(err) from err
+        return response
 
     def _get_token(self):
         """Obtain JWT token from e-kartoteka API using credentials."""
         headers = {"Content-type": "application/json"}
         payload = json.dumps(self._credentials)
-        req = request.Request(self.URL_TOKEN, payload.encode(), headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            response = self._send(
+                "POST", self.URL_TOKEN, data=payload.encode(), headers=headers
+            )
+            data = response.json()
             self.token = data["token"]
             return True
         except URLError as url_exception:
@@ -101,16 +145,8 @@ class Ekartoteka(Client):
         """Fetch user info and identifiers required by the API."""
         if self.token is None:
             return False
-        headers = {
-            "Content-type": "application/json",
-            'Authorization': f'Bearer {self.token}',
-        }
-        req = request.Request(self.URL_ME, headers=headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            data = self._send("GET", self.URL_ME, headers=self._auth_headers()).json()
             self.user_full_name = data["Nazwa"]
             self.user_email = data["Email"]
             self.user_id = data["DaneKsiegowe"][0]
@@ -126,27 +162,96 @@ class Ekartoteka(Client):
             return False
 
     def login(self):
-        """Complete the login flow and mark the client as logged in."""
-        self._get_token()
-        self._get_me()
+        """Reuse a cached token or complete the login flow."""
+        if self._session_store is not None and self._load_token():
+            logger.info("Ekartoteka: reusing cached token")
+            self._logged_in = True
+            return
+        self._login_fresh()
+
+    def _login_fresh(self):
+        """Run the full token + ``/me/`` flow and cache its result."""
+        token_ok = self._get_token()
+        me_ok = self._get_me()
         self._decode_token()
         self._logged_in = True
+        self._cached_token = None
+        if self._session_store is not None and token_ok and me_ok:
+            self._save_token()
+
+    def _session_key(self) -> tuple[str, str, str]:
+        return (
+            SESSION_PORTAL,
+            str(self._credentials.get("username")),
+            self._credentials.get("password") or "",
+        )
+
+    def _load_token(self) -> bool:
+        """Restore a cached token that is not about to expire."""
+        stored = self._session_store.load(*self._session_key(), max_age=float("inf"))
+        if stored is None:
+            return False
+        meta = stored.meta
+        try:
+            if meta["token_expire"] - TOKEN_EXPIRY_MARGIN <= time.time():
+                return False
+            self.token = meta["token"]
+            self.token_expire = meta["token_expire"]
+            self.client_id = meta["client_id"]
+            self.user_id = meta["user_id"]
+        except KeyError:
+            return False
+        self.user_full_name = meta.get("user_full_name")
+        self.user_email = meta.get("user_email")
+        self._cached_token = self.token
+        return True
+
+    def _save_token(self):
+        """Cache the token and the ids required to build API urls."""
+        self._session_store.save(
+            *self._session_key(),
+            meta={
+                "token": self.token,
+                "token_expire": self.token_expire,
+                "client_id": self.client_id,
+                "user_id": self.user_id,
+                "user_full_name": self.user_full_name,
+                "user_email": self.user_email,
+            },
+        )
+
+    def _get_json(self, url: str):
+        """GET an API url with the bearer token and parse the JSON body.
+
+        A 401 for a cached token triggers one full login and a retry; when
+        parallel requests are rejected together only the first logs in.
+        """
+        token = self.token
+        try:
+            return self._send("GET", url, headers=self._auth_headers()).json()
+        except HTTPError as err:
+            if err.code != 401 or token != self._cached_token:
+                raise
+        with self._login_lock:
+            if self.token == token:
+                logger.info("Ekartoteka: cached token rejected, logging in again")
+                self._session_store.clear(*self._session_key()[:2])
+                self._login_fresh()
+        return self._send("GET", url, headers=self._auth_headers()).json()
+
+    def _auth_headers(self) -> dict:
+        return {
+            "Content-type": "application/json",
+            'Authorization': f'Bearer {self.token}',
+        }
 
     def get_settlements(self, year: int):
         """Retrieve settlements table for a given year."""
         if self.token is None or not self._logged_in:
             raise NotInitializedError()
-        headers = {
-            "Content-type": "application/json",
-            'Authorization': f'Bearer {self.token}',
-        }
         url = self.URL_SETTLEMENTS.format(self.user_id, self.client_id, year)
-        req = request.Request(url, headers=headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            data = self._get_json(url)
             return True, data
         except URLError:
             return False, "Network Problem"
@@ -172,17 +277,9 @@ class Ekartoteka(Client):
         """Fetch premises data; returns (ok, data) or error description."""
         if self.token is None or not self._logged_in:
             raise NotInitializedError()
-        headers = {
-            "Content-type": "application/json",
-            'Authorization': f'Bearer {self.token}',
-        }
         url = self.URL_PREMISES.format(self.user_id, self.client_id)
-        req = request.Request(url, headers=headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            data = self._get_json(url)
             print(data)
             return True, data
         except URLError:
@@ -196,17 +293,9 @@ class Ekartoteka(Client):
         """Return the current monthly fees total (Brutto)."""
         if self.token is None or not self._logged_in:
             raise NotInitializedError()
-        headers = {
-            "Content-type": "application/json",
-            'Authorization': f'Bearer {self.token}',
-        }
         url = self.URL_MONTHLY_FEES_SUM.format(self.user_id, self.client_id)
-        req = request.Request(url, headers=headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            data = self._get_json(url)
             return data[0]["Brutto"]
         except URLError:
             return False, "Network Problem"
@@ -219,17 +308,9 @@ class Ekartoteka(Client):
         """Return map of monitored categories to their last update date."""
         if self.token is None or not self._logged_in:
             raise NotInitializedError()
-        headers = {
-            "Content-type": "application/json",
-            'Authorization': f'Bearer {self.token}',
-        }
         url = self.URL_UPDATE_DATES.format(self.user_id, self.client_id)
-        req = request.Request(url, headers=headers)
         try:
-            response = request.urlopen(req)
-            reader = codecs.getreader("utf-8")
-            # Parse Json
-            data = json.load(reader(response))
+            data = self._get_json(url)
             table = data["results"]
             updates = {}
             monitored_cats = ["DK", "DKL", "SRC", "LI", "NL", "NRB", "STL"]
@@ -249,9 +330,15 @@ class Ekartoteka(Client):
         """Aggregate current apartment fee and payment status info."""
         if self.token is None or not self._logged_in:
             raise NotInitializedError()
-        apartment_fee = self.get_current_fees_sum()
-        res_setl, delta = self.get_settlements_sum(datetime.now().year)
-        dates = self.get_update_stamp()
+        with ThreadPoolExecutor(max_workers=PARALLEL_REQUESTS) as pool:
+            fees = pool.submit(in_current_context(self.get_current_fees_sum))
+            settlements = pool.submit(
+                in_current_context(self.get_settlements_sum), datetime.now().year
+            )
+            stamps = pool.submit(in_current_context(self.get_update_stamp))
+        apartment_fee = fees.result()
+        res_setl, delta = settlements.result()
+        dates = stamps.result()
         if res_setl and delta is not None:
             if delta > 0:
                 paid = False
@@ -1,14 +1,25 @@
 """Scraper for ENEA portal to collect invoices and readouts."""
 
 import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
-from http.cookiejar import CookieJar
+from functools import partial
 
-from bs4 import BeautifulSoup, Tag
+import requests
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from loguru import logger
 
 from api_clients.client import Client
+from api_clients.html_parsing import parse_only
+from api_clients.page_archive import PageArchive
+from api_clients.parse_cache import ParseCache
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport, default_transport
+from run_metrics import in_current_context
+
+INVOICE_ROW_CLASS = 'datagrid-row invoice-row'
+READOUT_ROW_CLASS = 'datagrid-row-content'
 
 
 def _extract_amounts_main(bs):
@@ -115,7 +126,7 @@ def _extract_last_invoice(soup: BeautifulSoup):
 
     row = find_or_fail(
         soup,
-        {'name': 'div', 'attrs': {'class': 'datagrid-row invoice-row'}},
+        {'name': 'div', 'attrs': {'class': INVOICE_ROW_CLASS}},
         'invoice row',
     )
 
@@ -157,7 +168,7 @@ def _extract_last_readout(soup: BeautifulSoup):
 
     row = find_or_fail(
         soup,
-        {'name': 'div', 'attrs': {'class': 'datagrid-row-content'}},
+        {'name': 'div', 'attrs': {'class': READOUT_ROW_CLASS}},
         'readout row',
     )
 
@@ -167,6 +178,35 @@ def _extract_last_readout(soup: BeautifulSoup):
     return readout_value, readout_date
 
 
+def _first_row_markup(markup: str, row_class: str) -> str:
+    """Cut markup down to the first element with ``row_class``.
+
+    The slice starts at the tag carrying the class and ends where the next
+    such row begins, so the first row is complete while the rest of the
+    page is never parsed. Unexpected markup returns the page unchanged.
+    """
+    marker = markup.find(f'"{row_class}"')
+    start = markup.rfind('<', 0, marker) if marker >= 0 else -1
+    if start < 0:
+        return markup
+    following = markup.find(f'"{row_class}"', marker + len(row_class) + 2)
+    end = markup.rfind('<', 0, following) if following >= 0 else len(markup)
+    return markup[start:end]
+
+
+def parse_first_row(markup: str, row_class: str, extract):
+    """Run ``extract`` on a tree built from the first ``row_class`` div only.
+
+    Falls back to a full parse when the targeted tree is missing anything,
+    so ``ScraperStructureError`` is raised exactly as for the whole page.
+    """
+    strainer = SoupStrainer('div', attrs={'class': row_class})
+    try:
+        return extract(parse_only(_first_row_markup(markup, row_class), strainer))
+    except ScraperStructureError:
+        return extract(BeautifulSoup(markup, 'html.parser'))
+
+
 def parse_date(text: str):
     """Parse date in format 'dd.mm.yyyy'."""
     return datetime.strptime(text, "%d.%m.%Y")
@@ -211,28 +251,77 @@ class Enea(Client):
     URL_INVOICES = "/invoices/invoice-history"
     URL_READOUTS = "/meter/consumptionHistory"
 
-    def __init__(self, email, password):
-        """Initialize with email/password used for login."""
+    SESSION_PORTAL = "enea"
+
+    def __init__(
+        self,
+        email,
+        password,
+        session_store: SessionStore = None,
+        transport: Transport = None,
+        archive: PageArchive = None,
+        parse_cache: ParseCache = None,
+    ):
+        """Initialize with email/password used for login.
+
+        With a ``session_store`` the cookies of the last login are tried
+        first and the full login runs only when they are no longer valid.
+        Requests go through ``transport``, the shared one by default, and
+        fetched pages are kept in ``archive`` if given. With a
+        ``parse_cache`` pages equal to the last run are not parsed again.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
         self.email = email
         self.password = password
         self.userAgent = self.USER_AGENT
-        self.opener = None
+        self.session: requests.Session | None = None
         self.token = ""
         self.logged_in = False
+        self.session_store = session_store
+        self._transport = transport or default_transport()
+        self.archive = archive
+        self.parse_cache = parse_cache
+        self._invoices_html = None
+
+    def _open(self, path: str) -> tuple[str, str]:
+        """GET a portal page; return (final URL, decoded body)."""
+        response = self.session.get(self.URL_BASE + path)
+        response.raise_for_status()
+        return response.url, response.content.decode('utf-8')
+
+    def _resume_session(self) -> bool:
+        """Reuse stored cookies if the invoice page opens without a login.
+
+        The probe is the invoice page ``get_data`` needs anyway, so a valid
+        session costs no extra request. A rejected or failing stored session
+        is forgotten, so the caller goes on with the credential login.
+        """
+        stored = self.session_store.load(self.SESSION_PORTAL, self.email, self.password)
+        if stored is None:
+            return False
+        stored.restore(self.session.cookies)
+        try:
+            url, html = self._open(self.URL_INVOICES)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Stored ENEA session failed: {e}")
+            url = self.URL_BASE + self.URL_LOGIN
+        if self.URL_LOGIN in urllib.parse.urlparse(url).path:
+            self.session.cookies.clear()
+            self.session_store.clear(self.SESSION_PORTAL, self.email)
+            return False
+        self._invoices_html = html
+        return True
 
     def login(self):
-        """Login to the ENEA portal and keep cookies in an opener."""
-        cj = CookieJar()
-        # ssl._create_default_https_context = ssl._create_unverified_context
-        self.opener = urllib.request.build_opener(
-            urllib.request.HTTPCookieProcessor(cj)
-        )
-        request = urllib.request.Request(self.URL_BASE + self.URL_LOGIN)
-        request.add_header('User-Agent', self.userAgent)
-        result = self.opener.open(request).read()
-        result = result.decode('utf-8')
+        """Login to the ENEA portal and keep cookies in the session."""
+        self.session = self._transport.session(headers={'User-Agent': self.userAgent})
+        self._invoices_html = None
+        if self.session_store is not None and self._resume_session():
+            self.logged_in = True
+            return
+        _, result = self._open(self.URL_LOGIN)
 
-        soup = BeautifulSoup(result, 'html.parser')
+        soup = parse_only(result, SoupStrainer('input', attrs={'name': 'token'}))
         token_input = find_or_fail(
             soup,
             {'name': 'input', 'attrs': {'name': 'token'}},
@@ -247,36 +336,54 @@ class Enea(Client):
             'btnSubmit': "",
         }
 
-        form_data = urllib.parse.urlencode(form_parameters)
-        request = urllib.request.Request(self.URL_BASE + self.URL_LOGIN)
-        request.data = form_data.encode('utf-8')
-        request.add_header('User-Agent', self.userAgent)
+        result = self.session.post(self.URL_BASE + self.URL_LOGIN, data=form_parameters)
 
-        result = self.opener.open(request)
-
-        if result.status == 200:
+        if result.status_code == 200:
             self.logged_in = True
+            if self.session_store is not None:
+                self.session_store.save(
+                    self.SESSION_PORTAL, self.email, self.password, self.session.cookies
+                )
         else:
             self.logged_in = False
             raise ConnectionError
 
+    def _fetch_first_row(self, path: str, row_class: str, extract, html=None):
+        """Fetch a page unless already given and parse its first grid row."""
+        if html is None:
+            _, html = self._open(path)
+        source = self.SESSION_PORTAL + path
+        if self.archive is not None:
+            self.archive.store(source, html)
+        parse = partial(parse_first_row, html, row_class, extract)
+        if self.parse_cache is None:
+            return parse()
+        return self.parse_cache.get(source, parse, html)
+
     def get_data(self) -> EneaResults:
-        """Collect last invoice and readout, return as `EneaResults`."""
-        if self.opener is None:
+        """Collect last invoice and readout, return as `EneaResults`.
+
+        Both pages are requested at the same time on the logged-in session,
+        and each is parsed as soon as it arrives.
+        """
+        if self.session is None:
             raise RuntimeError("ENEA client not logged in")
-        request = urllib.request.Request(self.URL_BASE + self.URL_INVOICES)
-        request.add_header('User-Agent', self.userAgent)
-        result = self.opener.open(request).read()
-        result = result.decode('utf-8')
-        soup: BeautifulSoup = BeautifulSoup(result, 'html.parser')
-        invoice_date, due_date, value, unpaid, status = _extract_last_invoice(soup)
-
-        request = urllib.request.Request(self.URL_BASE + self.URL_READOUTS)
-        request.add_header('User-Agent', self.userAgent)
-        result = self.opener.open(request).read()
-        result = result.decode('utf-8')
-        soup = BeautifulSoup(result, 'html.parser')
-        readout_value, readout_date = _extract_last_readout(soup)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            invoice = pool.submit(
+                in_current_context(self._fetch_first_row),
+                self.URL_INVOICES,
+                INVOICE_ROW_CLASS,
+                _extract_last_invoice,
+                self._invoices_html,
+            )
+            readout = pool.submit(
+                in_current_context(self._fetch_first_row),
+                self.URL_READOUTS,
+                READOUT_ROW_CLASS,
+                _extract_last_readout,
+            )
+        invoice_date, due_date, value, unpaid, status = invoice.result()
+        readout_value, readout_date = readout.result()
         return EneaResults(
             last_invoice_date=invoice_date,
             last_invoice_due_date=due_date,
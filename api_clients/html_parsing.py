@@ -0,0 +1,13 @@
+"""Shared BeautifulSoup settings for the portal scrapers."""
+
+from importlib.util import find_spec
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml builds trees several times faster; it is used when installed
+HTML_PARSER = "lxml" if find_spec("lxml") is not None else "html.parser"
+
+
+def parse_only(markup: str, strainer: SoupStrainer) -> BeautifulSoup:
+    """Build a tree holding only the elements matched by ``strainer``."""
+    return BeautifulSoup(markup, HTML_PARSER, parse_only=strainer)
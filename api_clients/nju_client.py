@@ -1,12 +1,18 @@
 import datetime
-import urllib
+import re
+import urllib.parse
 from dataclasses import dataclass, fields
 from datetime import date
-from http.cookiejar import CookieJar
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from loguru import logger
 
+from api_clients.html_parsing import parse_only
+from api_clients.page_archive import PageArchive
+from api_clients.parse_cache import ParseCache
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport, default_transport
+
 # noinspection SpellCheckingInspection
 PAID = "zapłacona"
 USER_AGENT = (
@@ -16,6 +22,8 @@ USER_AGENT = (
 )
 LOGIN_URL = "https://www.njumobile.pl/logowanie?backUrl=/mojekonto/faktury"
 POST_URL = "https://www.njumobile.pl/logowanie?_DARGS=/profile-processes/login/login.jsp.portal-login-form"
+INVOICES_URL = "https://www.njumobile.pl/mojekonto/faktury"
+SESSION_PORTAL = "nju"
 
 
 def pretty_print_invoice(item: dict):
@@ -33,50 +41,55 @@ def pretty_print_invoice(item: dict):
     return result
 
 
+def _parse_date(text: str) -> date:
+    return datetime.datetime.strptime(text, "%d.%m.%Y").date()
+
+
+def _parse_optional_date(text: str) -> date | None:
+    return _parse_date(text) if text != "" else None
+
+
+def _parse_amount(text: str) -> float:
+    return float(text.replace(",", ".").split(" ")[0])
+
+
+def _parse_doc_id(cell: Tag) -> str:
+    content = next(cell.children)
+    if content.attrs:
+        return content['id'].split('-')[1]
+    return content.text
+
+
+# noinspection SpellCheckingInspection
+# data-title of an invoice table cell -> (document key, extractor of the text)
+_TEXT_FIELDS = {
+    "data wystawienia": ("issue_date", _parse_date),
+    "termin płatności": ("due_date", _parse_date),
+    "data zaksięgowania": ("post_date", _parse_optional_date),
+    "kwota zapłacona": ("amount_paid", _parse_amount),
+    "do zapłaty": ("amount_payable", _parse_amount),
+    "typ dokumentu": ("document_type", str),
+    "za okres": ("accounting_period", str),
+    "status": ("status", str),
+}
+
+INVOICE_ROW_ID = re.compile(r"^id_abc-(\d+)$")
+
+
 # noinspection SpellCheckingInspection
 def parse_row(row):
-    children = row.children
     document = dict()
-    for item in children:
-        if item["class"][0] == 'left-right-bg':
-            if item['data-title'] == "nr dokumentu":
-                content = item.children.__next__()
-                if content.attrs.__len__() > 0:
-                    document['doc_id']: str = content['id'].split('-')[1]
-                else:
-                    document['doc_id']: str = content.text
-            elif item['data-title'] == "data wystawienia":
-                date_issue = datetime.datetime.strptime(
-                    item.get_text(), "%d.%m.%Y"
-                ).date()
-                document['issue_date']: date = date_issue
-            elif item['data-title'] == "termin płatności":
-                date_due = datetime.datetime.strptime(
-                    item.get_text(), "%d.%m.%Y"
-                ).date()
-                document['due_date']: date = date_due
-            elif item['data-title'] == "data zaksięgowania":
-                if item.get_text() != "":
-                    book_date = datetime.datetime.strptime(
-                        item.get_text(), "%d.%m.%Y"
-                    ).date()
-                else:
-                    book_date = None
-                document['post_date']: date = book_date
-            elif item['data-title'] == "kwota zapłacona":
-                document['amount_paid']: float = float(
-                    item.get_text().replace(",", ".").split(" ")[0]
-                )
-            elif item['data-title'] == "do zapłaty":
-                document['amount_payable']: float = float(
-                    item.get_text().replace(",", ".").split(" ")[0]
-                )
-            elif item['data-title'] == "typ dokumentu":
-                document['document_type']: str = item.get_text()
-            elif item['data-title'] == "za okres":
-                document['accounting_period']: str = item.get_text()
-            elif item['data-title'] == "status":
-                document['status']: str = item.get_text()
+    for item in row.children:
+        if not isinstance(item, Tag) or item["class"][0] != 'left-right-bg':
+            continue
+        title = item['data-title']
+        if title == "nr dokumentu":
+            document['doc_id'] = _parse_doc_id(item)
+            continue
+        field = _TEXT_FIELDS.get(title)
+        if field is not None:
+            key, extract = field
+            document[key] = extract(item.get_text())
     return document
 
 
@@ -163,26 +176,69 @@ def print_summary(table: list[NjuInvoice], text_if_none: str = "") -> str:
 
 
 class Nju:
-    def __init__(self, phone_nmb: str, password: str):
+    def __init__(
+        self,
+        phone_nmb: str,
+        password: str,
+        session_store: SessionStore = None,
+        transport: Transport = None,
+        archive: PageArchive = None,
+        parse_cache: ParseCache = None,
+    ):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
         self.userAgent = USER_AGENT
-        self.opener = None
+        self._transport = transport or default_transport()
+        self.session = None
         self.logged_in: bool = False
         self.scrapped_html = None
         self.parsed = False
         self.phone_nmb = phone_nmb
         self.password = password
+        self.session_store = session_store
+        self.archive = archive
+        self.parse_cache = parse_cache
+
+    def _resume_session(self) -> bool:
+        """Open the invoice page with stored cookies, if they are still valid.
+
+        A rejected or failing stored session is forgotten, so the caller
+        goes on with the credential login.
+        """
+        stored = self.session_store.load(SESSION_PORTAL, self.phone_nmb, self.password)
+        if stored is None:
+            return False
+        stored.restore(self.session.cookies)
+        try:
+            result = self.session.get(INVOICES_URL)
+            result.raise_for_status()
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.warning(f"Stored Nju session of {self.phone_nmb} failed: {e}")
+            result = None
+        if result is None or "/logowanie" in urllib.parse.urlparse(result.url).path:
+            self.session.cookies.clear()
+            self.session_store.clear(SESSION_PORTAL, self.phone_nmb)
+            return False
+        self.scrapped_html = result.content.decode('utf-8')
+        self._archive_page()
+        return True
+
+    def _archive_page(self):
+        if self.archive is not None:
+            self.archive.store(self._source, self.scrapped_html)
+
+    @property
+    def _source(self) -> str:
+        return f"{SESSION_PORTAL}/{self.phone_nmb}"
 
     def login(self):
-        cj = CookieJar()
-        # ssl._create_default_https_context = ssl._create_unverified_context
-        self.opener = urllib.request.build_opener(
-            urllib.request.HTTPCookieProcessor(cj)
-        )
-        request = urllib.request.Request(LOGIN_URL)
-        request.add_header('User-Agent', USER_AGENT)
+        self.session = self._transport.session(headers={'User-Agent': USER_AGENT})
         try:
-            result = self.opener.open(request).read()
-            result = result.decode('utf-8')
+            if self.session_store is not None and self._resume_session():
+                self.logged_in = True
+                return
+            result = self.session.get(LOGIN_URL)
+            result.raise_for_status()
+            result = result.content.decode('utf-8')
             login_soup = BeautifulSoup(result, 'html.parser')
             input_field = login_soup.find("input", attrs={'name': "_dynSessConf"})
             authenticity_token = input_field.attrs["value"]
@@ -205,46 +261,58 @@ class Nju:
                 "_DARGS": ("/profile-processes/login/login.jsp.portal-login-form"),
             }
 
-            form_data = urllib.parse.urlencode(payload)
-            request = urllib.request.Request(POST_URL)
-            request.data = form_data.encode('utf-8')
-            request.add_header('User-Agent', self.userAgent)
-            request.add_header("Origin", "https://www.njumobile.pl")
-            request.add_header(
-                "Referer",
-                "https://www.njumobile.pl/logowanie?backUrl=/mojekonto/faktury",
+            result = self.session.post(
+                POST_URL,
+                data=payload,
+                headers={
+                    "Origin": "https://www.njumobile.pl",
+                    "Referer": (
+                        "https://www.njumobile.pl/logowanie?backUrl=/mojekonto/faktury"
+                    ),
+                },
             )
-            result = self.opener.open(request)
+            result.raise_for_status()
             self.logged_in = True
-            result_str = result.read().decode('utf-8')
+            result_str = result.content.decode('utf-8')
             self.scrapped_html = result_str
+            self._archive_page()
+            if self.session_store is not None:
+                self.session_store.save(
+                    SESSION_PORTAL, self.phone_nmb, self.password, self.session.cookies
+                )
         except Exception as e:
             logger.exception("Nju client failed", exc_info=e)
             self.logged_in = False
 
     def parse_html(self):
+        """Parse invoice rows ``id_abc-1``, ``id_abc-2``, ... in one pass.
+
+        Only the invoice rows are built into a tree; like the row-by-row
+        lookup, parsing stops at the first missing row number. A page equal
+        to the last run is answered from the parse cache.
+        """
         if not self.logged_in:
             raise ConnectionError
-        bs = BeautifulSoup(self.scrapped_html, 'html.parser')
+        if self.parse_cache is None:
+            invoices = self._parse_invoices()
+        else:
+            invoices = self.parse_cache.get(
+                self._source, self._parse_invoices, self.scrapped_html
+            )
+        self.parsed = True
+        return list(invoices)
+
+    def _parse_invoices(self) -> list[NjuInvoice]:
+        rows = parse_only(self.scrapped_html, SoupStrainer("tr", id=INVOICE_ROW_ID))
+        by_number = {}
+        for raw_row in rows.find_all("tr", recursive=False):
+            number = int(INVOICE_ROW_ID.match(raw_row["id"]).group(1))
+            by_number.setdefault(number, raw_row)
         table2 = []
         i = 1
-        while True:
-            raw_row = bs.find("tr", id=f"id_abc-{i}")
-            if raw_row is None:
-                break
-            else:
-                row = parse_row(raw_row)
-                row["phone_nmb"] = self.phone_nmb
-                row_cls = DataClassUnpack.instantiate(NjuInvoice, row)
-                table2.append(row_cls)
-                i = i + 1
-        self.parsed = True
+        while i in by_number:
+            row = parse_row(by_number[i])
+            row["phone_nmb"] = self.phone_nmb
+            table2.append(DataClassUnpack.instantiate(NjuInvoice, row))
+            i = i + 1
         return table2
-
-    def write2file(self):
-        if self.logged_in:
-            file = open('nju_html.html', 'w', encoding='utf-8')
-            file.write(self.scrapped_html)
-            file.close()
-        else:
-            raise ConnectionError
@@ -0,0 +1,122 @@
+"""Compressed, content-addressed archive of pages fetched by the scrapers."""
+
+import gzip
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from loguru import logger
+
+KEEP_PER_SOURCE = 30
+KEEP_FOR = timedelta(days=90)
+
+
+class PageArchive:
+    """Keeps the history of raw responses for debugging parser breakage.
+
+    Bodies are gzip-compressed and stored under their SHA-256, so a page
+    that did not change since the last run costs one index line. The index
+    (``index.jsonl``) records when each source returned which body; entries
+    beyond ``keep_per_source`` per source or older than ``keep_for`` are
+    dropped together with bodies nothing refers to any more.
+
+    Writes run on a background thread; ``close`` waits for them.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        keep_per_source: int = KEEP_PER_SOURCE,
+        keep_for: timedelta = KEEP_FOR,
+    ):
+        """Use ``directory`` for the index and the compressed bodies."""
+        self._directory = Path(directory)
+        self._keep_per_source = keep_per_source
+        self._keep_for = keep_for
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self) -> Path:
+        return self._directory / "index.jsonl"
+
+    def _body_path(self, digest: str) -> Path:
+        return self._directory / digest[:2] / f"{digest}.gz"
+
+    def store(self, source: str, body: str | bytes) -> str:
+        """Queue ``body`` fetched from ``source`` for archiving; return its hash."""
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        digest = hashlib.sha256(data).hexdigest()
+        entry = {
+            "time": datetime.now().isoformat(),
+            "source": source,
+            "sha256": digest,
+            "size": len(data),
+        }
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="page-archive"
+                )
+            self._executor.submit(self._write, entry, data)
+        return digest
+
+    def _write(self, entry: dict, data: bytes):
+        try:
+            path = self._body_path(entry["sha256"])
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".tmp")
+                tmp_path.write_bytes(gzip.compress(data))
+                tmp_path.replace(path)
+            with self._index_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._prune()
+        except OSError as err:
+            logger.warning(f"Cannot archive page of {entry['source']}: {err}")
+
+    def _prune(self):
+        entries = self.history()
+        cutoff = (datetime.now() - self._keep_for).isoformat()
+        kept: list[dict] = []
+        per_source: dict[str, int] = {}
+        for entry in reversed(entries):
+            count = per_source.get(entry["source"], 0)
+            if count < self._keep_per_source and entry["time"] >= cutoff:
+                per_source[entry["source"]] = count + 1
+                kept.append(entry)
+        if len(kept) == len(entries):
+            return
+        kept.reverse()
+        tmp_path = self._index_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            "".join(json.dumps(entry) + "\n" for entry in kept), encoding="utf-8"
+        )
+        tmp_path.replace(self._index_path)
+        referenced = {entry["sha256"] for entry in kept}
+        for entry in entries:
+            if entry["sha256"] not in referenced:
+                self._body_path(entry["sha256"]).unlink(missing_ok=True)
+
+    def history(self, source: str = None) -> list[dict]:
+        """Index entries, oldest first, optionally only of one source."""
+        try:
+            lines = self._index_path.read_text(encoding="utf-8").splitlines()
+        except OSError:
+            return []
+        entries = [json.loads(line) for line in lines if line.strip()]
+        return [e for e in entries if source is None or e["source"] == source]
+
+    def load(self, digest: str) -> bytes:
+        """Return an archived body by its hash."""
+        return gzip.decompress(self._body_path(digest).read_bytes())
+
+    def close(self):
+        """Wait until queued pages are written."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,107 @@
+"""Cache of scraper parse results keyed by the hash of the fetched pages."""
+
+import hashlib
+import json
+import pickle
+import re
+import threading
+from collections.abc import Callable
+from pathlib import Path
+
+from loguru import logger
+
+# bump when a parser changes its output for the same page
+CACHE_VERSION = 1
+
+# parts of a page that change on every request without changing its data
+_VOLATILE = (
+    re.compile(rb"<input[^>]*type=[\"']hidden[\"'][^>]*>", re.IGNORECASE),
+    re.compile(rb"<meta[^>]*csrf[^>]*>", re.IGNORECASE),
+    re.compile(rb"\snonce=[\"'][^\"']*[\"']", re.IGNORECASE),
+)
+_WHITESPACE = re.compile(rb"\s+")
+
+
+def normalize(body: str | bytes) -> bytes:
+    """Return the part of a response body that carries its data.
+
+    JSON is re-serialized with sorted keys; in HTML, hidden form fields,
+    CSRF meta tags and nonces are dropped and whitespace is collapsed.
+    """
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    if data.lstrip()[:1] in (b"{", b"["):
+        try:
+            return json.dumps(json.loads(data), sort_keys=True).encode("utf-8")
+        except ValueError:
+            pass
+    for pattern in _VOLATILE:
+        data = pattern.sub(b"", data)
+    return _WHITESPACE.sub(b" ", data).strip()
+
+
+class ParseCache:
+    """Remembers the last parse result of each source.
+
+    A result is reused when the normalized bodies it was parsed from are
+    the same as now, so unchanged pages are not parsed at all. Results are
+    pickled to ``directory``, which holds only data written by this cache.
+    """
+
+    def __init__(self, directory: Path):
+        """Use ``directory`` for one cache file per source."""
+        self._directory = Path(directory)
+        self._entries: dict[str, tuple[str, object]] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, source: str) -> Path:
+        key = hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+        return self._directory / f"parsed-{key}.pickle"
+
+    @staticmethod
+    def digest(*bodies: str | bytes) -> str:
+        """Hash of the normalized bodies."""
+        sha = hashlib.sha256(str(CACHE_VERSION).encode())
+        for body in bodies:
+            normalized = normalize(body)
+            sha.update(len(normalized).to_bytes(8, "big"))
+            sha.update(normalized)
+        return sha.hexdigest()
+
+    def _entry(self, source: str) -> tuple[str, object] | None:
+        with self._lock:
+            if source in self._entries:
+                return self._entries[source]
+        try:
+            with self._path(source).open("rb") as f:
+                entry = pickle.load(f)
+        except OSError:
+            return None
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            # any pickle of an old or broken entry is just a cache miss
+            logger.warning(f"Cannot load parse result of {source}: {err}")
+            return None
+        with self._lock:
+            return self._entries.setdefault(source, entry)
+
+    def get(self, source: str, parser: Callable[[], object], *bodies: str | bytes):
+        """Return the parse result of ``bodies`` fetched from ``source``.
+
+        ``parser`` is called only when the bodies differ from the ones the
+        cached result of the source was parsed from.
+        """
+        digest = self.digest(*bodies)
+        entry = self._entry(source)
+        if entry is not None and entry[0] == digest:
+            return entry[1]
+        result = parser()
+        with self._lock:
+            self._entries[source] = (digest, result)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(source).with_suffix(".tmp")
+            with tmp_path.open("wb") as f:
+                pickle.dump((digest, result), f)
+            tmp_path.replace(self._path(source))
+        except OSError as err:
+            logger.warning(f"Cannot store parse result of {source}: {err}")
+        return result
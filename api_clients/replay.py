@@ -0,0 +1,196 @@
+"""Record portal traffic into fixtures and replay it without network access."""
+
+import base64
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import quote, quote_plus, urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+SCRUBBED = "SCRUBBED"
+# secrets shorter than this would mangle unrelated text
+MIN_SECRET_LENGTH = 4
+SENSITIVE_HEADERS = ("authorization", "cookie", "set-cookie")
+# headers describing the wire form of a body that is stored decoded
+_WIRE_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+_JWT_SIGNATURE = re.compile(r"(eyJ[\w-]+\.eyJ[\w-]+\.)[\w-]+")
+
+
+class Scrubber:
+    """Replaces credentials in recorded text.
+
+    Every secret is replaced in its plain, URL-quoted and form-encoded form;
+    signatures of JWT tokens are replaced too, so tokens can still be
+    decoded but are useless outside the recording.
+    """
+
+    def __init__(self, secrets=()):
+        """Scrub the given secret values (short and empty ones are ignored)."""
+        variants = set()
+        for secret in secrets:
+            if secret and len(secret) >= MIN_SECRET_LENGTH:
+                variants.update({secret, quote(secret, safe=""), quote_plus(secret)})
+        # longest first, so a secret containing another is replaced whole
+        self._variants = sorted(variants, key=len, reverse=True)
+
+    def __call__(self, text: str) -> str:
+        """Return ``text`` with all secrets replaced."""
+        for variant in self._variants:
+            text = text.replace(variant, SCRUBBED)
+        return _JWT_SIGNATURE.sub(rf"\1{SCRUBBED}", text)
+
+
+def _encode_body(body) -> dict:
+    if body is None:
+        return {"text": ""}
+    if isinstance(body, str):
+        return {"text": body}
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(data: dict) -> bytes:
+    if "base64" in data:
+        return base64.b64decode(data["base64"])
+    return data["text"].encode("utf-8")
+
+
+class RecordingBackend(BaseAdapter):
+    """Transport backend that stores every exchange of a real backend.
+
+    Exchanges are appended to one ``<host>.jsonl`` file per host in
+    ``directory``, in the order they completed. Credentials given as
+    ``secrets``, sensitive headers and JWT signatures are scrubbed before
+    anything is written.
+    """
+
+    def __init__(self, directory: Path, secrets=(), backend: BaseAdapter = None):
+        """Record to ``directory`` what ``backend`` (pooled HTTP) returns."""
+        super().__init__()
+        self._directory = Path(directory)
+        self._scrub = Scrubber(secrets)
+        self._backend = backend or HTTPAdapter()
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        """Send through the real backend and record the exchange."""
+        response = self._backend.send(request, **kwargs)
+        exchange = {
+            "request": {
+                "method": request.method,
+                "url": self._scrub(request.url),
+                "body": self._scrub_body(request.body),
+            },
+            "response": {
+                "status": response.status_code,
+                "reason": response.reason,
+                "url": self._scrub(response.url),
+                "headers": {
+                    name: self._scrub(value)
+                    for name, value in response.headers.items()
+                    if name.lower() not in SENSITIVE_HEADERS + _WIRE_HEADERS
+                },
+                "body": self._scrub_body(response.content),
+            },
+        }
+        host = urlparse(request.url).hostname or "unknown"
+        with self._lock:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            with (self._directory / f"{host}.jsonl").open("a", encoding="utf-8") as f:
+                f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+        return response
+
+    def _scrub_body(self, body) -> dict:
+        data = _encode_body(body)
+        if "text" in data:
+            data["text"] = self._scrub(data["text"])
+        return data
+
+    def close(self):
+        """Close the real backend."""
+        self._backend.close()
+
+
+class ReplayBackend(BaseAdapter):
+    """Transport backend serving exchanges recorded by ``RecordingBackend``.
+
+    Requests are matched by method and URL, with the same ``secrets``
+    scrubbed as during recording. Repeated requests get the recorded
+    responses in order, and the last one once they run out. Each response
+    is delayed by ``latency`` seconds plus a uniform ``jitter``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        secrets=(),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int | None = None,
+    ):
+        """Load all fixtures found in ``directory``."""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        super().__init__()
+        self._scrub = Scrubber(secrets)
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._exchanges: dict[tuple[str, str], list[dict]] = defaultdict(list)
+        self._served: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+        for path in sorted(Path(directory).glob("*.jsonl")):
+            with path.open(encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        exchange = json.loads(line)
+                        request = exchange["request"]
+                        key = (request["method"], request["url"])
+                        self._exchanges[key].append(exchange["response"])
+        logger.info(
+            f"Replaying {sum(map(len, self._exchanges.values()))} "
+            f"HTTP exchanges from {directory}"
+        )
+
+    def _next(self, key: tuple[str, str]) -> dict | None:
+        with self._lock:
+            recorded = self._exchanges.get(key)
+            if not recorded:
+                return None
+            index = min(self._served[key], len(recorded) - 1)
+            self._served[key] += 1
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(delay, 0.0))
+        return recorded[index]
+
+    def send(self, request, **kwargs):
+        """Return the recorded response for ``request``."""
+        recorded = self._next((request.method, self._scrub(request.url)))
+        if recorded is None:
+            raise requests.ConnectionError(
+                f"No recorded response for {request.method} {request.url}",
+                request=request,
+            )
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.reason = recorded["reason"]
+        response.url = recorded["url"]
+        response.headers = CaseInsensitiveDict(recorded["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        # pylint: disable-next=protected-access
+        response._content = _decode_body(recorded["body"])
+        response.request = request
+        return response
+
+    def close(self):
+        """Nothing to release."""
@@ -0,0 +1,166 @@
+"""Encrypted on-disk store of portal login sessions (cookies and metadata)."""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from http.cookiejar import Cookie, CookieJar
+from pathlib import Path
+
+from cryptography.fernet import Fernet, InvalidToken
+from loguru import logger
+
+SALT_SIZE = 16
+PBKDF2_ITERATIONS = 200_000
+DEFAULT_MAX_AGE = 12 * 60 * 60
+
+_COOKIE_FIELDS = (
+    "version",
+    "name",
+    "value",
+    "port",
+    "port_specified",
+    "domain",
+    "domain_specified",
+    "domain_initial_dot",
+    "path",
+    "path_specified",
+    "secure",
+    "expires",
+    "discard",
+    "comment",
+    "comment_url",
+)
+
+
+def cookies_to_list(jar: CookieJar) -> list[dict]:
+    """Serialize cookies of a jar into JSON-friendly dicts."""
+    result = []
+    for cookie in jar:
+        item = {name: getattr(cookie, name) for name in _COOKIE_FIELDS}
+        item["rest"] = dict(cookie._rest)  # pylint: disable=protected-access
+        result.append(item)
+    return result
+
+
+def load_cookies(jar: CookieJar, items: list[dict]):
+    """Add serialized cookies to a jar, skipping expired ones."""
+    now = time.time()
+    for item in items:
+        cookie = Cookie(**item)
+        if not cookie.is_expired(now):
+            jar.set_cookie(cookie)
+
+
+@dataclass
+class StoredSession:
+    """Cookies and client metadata restored from the store."""
+
+    cookies: list[dict]
+    meta: dict = field(default_factory=dict)
+    saved: float = 0.0
+
+    def restore(self, jar: CookieJar):
+        """Load stored cookies into ``jar``."""
+        load_cookies(jar, self.cookies)
+
+
+class SessionStore:
+    """Keeps one encrypted session file per portal account.
+
+    Files are encrypted with a key derived from the account password, so
+    sessions are unreadable without it and a changed password simply
+    invalidates them. Sessions older than ``max_age`` seconds are ignored.
+
+    Key derivation is deliberately slow, so derived keys are cached per
+    password and salt, and a password keeps its salt for the lifetime of
+    the store instead of getting a new one on every save.
+    """
+
+    def __init__(self, directory: Path, max_age: float = DEFAULT_MAX_AGE):
+        """Use ``directory`` for session files."""
+        self._directory = Path(directory)
+        self._max_age = max_age
+        self._keys: dict[tuple[str, bytes], Fernet] = {}
+        self._salts: dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, portal: str, account: str) -> Path:
+        key = hashlib.sha256(f"{portal}:{account}".encode()).hexdigest()
+        return self._directory / f"{key}.session"
+
+    def _fernet(self, password: str, salt: bytes) -> Fernet:
+        password = password or ""
+        with self._lock:
+            fernet = self._keys.get((password, salt))
+            if fernet is None:
+                key = hashlib.pbkdf2_hmac(
+                    "sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS
+                )
+                fernet = Fernet(base64.urlsafe_b64encode(key))
+                self._keys[password, salt] = fernet
+            self._salts.setdefault(password, salt)
+        return fernet
+
+    def _salt(self, password: str) -> bytes:
+        with self._lock:
+            return self._salts.get(password or "") or os.urandom(SALT_SIZE)
+
+    def load(
+        self, portal: str, account: str, password: str, max_age: float = None
+    ) -> StoredSession | None:
+        """Return the stored session of an account, or None if unusable.
+
+        ``max_age`` overrides the store default, e.g. for sessions whose
+        validity the client checks itself.
+        """
+        try:
+            raw = self._path(portal, account).read_bytes()
+        except OSError:
+            return None
+        salt, token = raw[:SALT_SIZE], raw[SALT_SIZE:]
+        try:
+            data = json.loads(self._fernet(password, salt).decrypt(token))
+        except (InvalidToken, ValueError):
+            logger.warning(f"Cannot decrypt stored {portal} session, ignoring it")
+            return None
+        session = StoredSession(**data)
+        if max_age is None:
+            max_age = self._max_age
+        if time.time() - session.saved > max_age:
+            return None
+        return session
+
+    def save(
+        self,
+        portal: str,
+        account: str,
+        password: str,
+        jar: CookieJar = None,
+        meta: dict = None,
+    ):
+        """Encrypt and store cookies of ``jar`` with client metadata."""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        session = StoredSession(
+            cookies=cookies_to_list(jar) if jar is not None else [],
+            meta=meta or {},
+            saved=time.time(),
+        )
+        salt = self._salt(password)
+        token = self._fernet(password, salt).encrypt(
+            json.dumps(session.__dict__).encode("utf-8")
+        )
+        path = self._path(portal, account)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(salt + token)
+            path.chmod(0o600)
+        except OSError as err:
+            logger.warning(f"Cannot store {portal} session: {err}")
+
+    def clear(self, portal: str, account: str):
+        """Forget the stored session of an account."""
+        self._path(portal, account).unlink(missing_ok=True)
@@ -0,0 +1,144 @@
+"""Shared pooled HTTP transport used by all portal clients."""
+
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+
+from run_metrics import count_bytes
+
+DEFAULT_TIMEOUT = 20
+# distinct portal hosts and concurrent requests per host
+POOL_HOSTS = 8
+POOL_PER_HOST = 4
+
+
+@dataclass
+class HostStats:
+    """Request count, transferred bytes and time spent for one host."""
+
+    requests: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    elapsed_s: float = 0.0
+
+
+class TransportSession(requests.Session):
+    """Session with a default timeout that reports traffic to its transport."""
+
+    def __init__(self, transport: "Transport"):
+        """Create a session bound to ``transport``."""
+        super().__init__()
+        self._transport = transport
+
+    def request(self, method, url, *args, **kwargs):
+        """Send a request; ``timeout`` defaults to the transport timeout."""
+        kwargs.setdefault("timeout", self._transport.timeout)
+        start = time.perf_counter()
+        response = super().request(method, url, *args, **kwargs)
+        self._transport.record(response, time.perf_counter() - start)
+        return response
+
+    def close(self):
+        """Leave the shared connection pools open for other sessions."""
+
+
+class Transport:
+    """Keep-alive connection pools per host shared by client sessions.
+
+    Each client gets its own ``requests.Session`` (and so its own cookies)
+    from ``session``, but all sessions send through one backend adapter, so
+    a TLS connection to a host is opened once per run and then reused.
+    Responses are decoded by requests/urllib3, which handles gzip and
+    deflate, and brotli when the ``brotli`` package is installed.
+
+    The backend is pluggable: any ``requests`` adapter, e.g. one replaying
+    recorded responses, can replace the pooled ``HTTPAdapter``.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, backend: BaseAdapter = None):
+        """Create a transport with a pooled adapter unless ``backend`` is given."""
+        self.timeout = timeout
+        self._backend = backend or HTTPAdapter(
+            pool_connections=POOL_HOSTS, pool_maxsize=POOL_PER_HOST
+        )
+        self._stats: dict[str, HostStats] = defaultdict(HostStats)
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> BaseAdapter:
+        """Adapter actually sending the requests."""
+        return self._backend
+
+    @backend.setter
+    def backend(self, adapter: BaseAdapter):
+        """Replace the adapter for sessions created from now on."""
+        self._backend = adapter
+
+    def session(self, headers: dict = None) -> requests.Session:
+        """Return a new session sending through the shared backend."""
+        session = TransportSession(self)
+        session.mount("https://", self._backend)
+        session.mount("http://", self._backend)
+        if headers:
+            session.headers.update(headers)
+        return session
+
+    def record(self, response: requests.Response, elapsed: float):
+        """Account a finished request in host stats and run metrics."""
+        request = response.request
+        body = request.body or b""
+        sent = len(body.encode("utf-8") if isinstance(body, str) else body)
+        sent += sum(len(k) + len(v) + 4 for k, v in request.headers.items())
+        received = _wire_size(response)
+        count_bytes(received=received, sent=sent)
+        with self._lock:
+            stats = self._stats[urlparse(response.url).hostname or ""]
+            stats.requests += 1
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+            stats.elapsed_s += elapsed
+
+    def close(self):
+        """Close pooled connections of the backend."""
+        self._backend.close()
+
+    def stats(self) -> dict[str, HostStats]:
+        """Traffic per host since the transport was created."""
+        with self._lock:
+            return dict(self._stats)
+
+    def summary(self) -> str:
+        """One-line traffic summary per host."""
+        return "HTTP: " + ", ".join(
+            f"{host} {s.requests} req {s.bytes_received / 1024:.0f} kB "
+            f"{s.elapsed_s:.2f}s"
+            for host, s in self.stats().items()
+        )
+
+
+def _wire_size(response: requests.Response) -> int:
+    """Bytes received for a response body, compressed size when known."""
+    raw = getattr(response, "raw", None)
+    try:
+        wire = raw.tell()
+    except (AttributeError, OSError, TypeError):
+        wire = 0
+    return wire or len(response.content)
+
+
+_default_transport: Transport | None = None
+_default_lock = threading.Lock()
+
+
+def default_transport() -> Transport:
+    """Return the transport shared by clients created without one."""
+    global _default_transport  # pylint: disable=global-statement
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = Transport()
+        return _default_transport
@@ -0,0 +1,171 @@
+"""Time the workbook pipeline on synthetic workbooks of growing size.
+
+Run from the project root::
+
+    python -m benchmarks.run --size small --size medium --output bench.json
+    python -m benchmarks.run --compare bench.json
+
+Each operation is timed on a fresh book prepared outside the timed block;
+the median of ``--repeat`` runs is reported in milliseconds.
+"""
+
+import json
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from io import BytesIO
+from pathlib import Path
+
+import click
+import pandas as pd
+from loguru import logger
+from openpyxl import load_workbook
+
+import anaytics
+from benchmarks.workbook_generator import generate_workbook
+from mailer import Mailer
+from payment_book import PaymentBook
+from payment_sheet import PaymentSheet
+
+# name: (sheets, monitored columns, years of monthly rows)
+SIZES = {
+    "small": (2, 4, 2),
+    "medium": (4, 8, 10),
+    "large": (8, 16, 30),
+}
+
+
+class _NoAdapter:
+    """Mail adapter stand-in; rendering never touches it."""
+
+
+def _loaded_book(data: bytes, monitored_sheets: dict) -> PaymentBook:
+    book = PaymentBook(monitored_sheets)
+    book.load_and_process(data)
+    return book
+
+
+def _scanned_sheets(data: bytes, monitored_sheets: dict) -> list[PaymentSheet]:
+    """Scan sheets like ``load_and_process`` without planning next month."""
+    workbook = load_workbook(filename=BytesIO(data), read_only=True)
+    sheets = []
+    try:
+        for name, columns in monitored_sheets.items():
+            sheet = PaymentSheet(None, name, columns)
+            sheet.scan(workbook[name])
+            sheet.populate_categories(sheet.get_active_row)
+            sheets.append(sheet)
+    finally:
+        workbook.close()
+    return sheets
+
+
+def _operations(data: bytes, monitored_sheets: dict, directory: Path) -> dict:
+    """Return operation name -> (setup, timed function of the setup result)."""
+
+    def render(book: PaymentBook):
+        mailer = Mailer("", "", book, adapter=_NoAdapter())
+        mailer.statuses = []
+        return mailer.render()
+
+    def dataframe(book: PaymentBook):
+        return pd.DataFrame.from_dict(anaytics.generate_dataframe(book), orient="index")
+
+    def populate_next_month(sheets: list[PaymentSheet]):
+        for sheet in sheets:
+            sheet.populate_next_month(sheet.active_row)
+
+    def loaded():
+        return _loaded_book(data, monitored_sheets)
+
+    return {
+        "load_and_process": (lambda: None, lambda _: loaded()),
+        "populate_next_month": (
+            lambda: _scanned_sheets(data, monitored_sheets),
+            populate_next_month,
+        ),
+        "payment_list": (loaded, lambda book: book.payment_list),
+        "Mailer.render": (loaded, render),
+        "generate_dataframe": (loaded, dataframe),
+        "save_to_file": (
+            loaded,
+            lambda book: book.save_to_file(directory / "Oplaty.xlsm"),
+        ),
+    }
+
+
+def _median_ms(setup: Callable, function: Callable, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        prepared = setup()
+        start = time.perf_counter()
+        function(prepared)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run_benchmarks(sizes: list[str], repeat: int) -> dict[str, dict[str, float]]:
+    """Return median milliseconds per size and operation."""
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            sheets, columns, years = SIZES[size]
+            data, monitored_sheets = generate_workbook(sheets, columns, years)
+            operations = _operations(data, monitored_sheets, Path(directory))
+            results[size] = {
+                name: _median_ms(setup, function, repeat)
+                for name, (setup, function) in operations.items()
+            }
+    return results
+
+
+def format_table(results: dict, baseline: dict | None = None) -> str:
+    """Render results as a text table, with ratios to ``baseline`` if given."""
+    sizes = list(results)
+    operations = list(next(iter(results.values())))
+    header = f"{'operation':<22}" + "".join(f"{size:>18}" for size in sizes)
+    lines = [header, "-" * len(header)]
+    for operation in operations:
+        line = f"{operation:<22}"
+        for size in sizes:
+            cell = f"{results[size][operation]:.1f} ms"
+            previous = (baseline or {}).get(size, {}).get(operation)
+            if previous:
+                cell += f" x{results[size][operation] / previous:.2f}"
+            line += f"{cell:>18}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option(
+    "--size",
+    "sizes",
+    type=click.Choice(list(SIZES)),
+    multiple=True,
+    help="Workbook sizes to run, all by default",
+)
+@click.option("--repeat", default=5, show_default=True, help="Runs per operation")
+@click.option("--output", type=click.Path(path_type=Path), help="Save results as JSON")
+@click.option(
+    "--compare",
+    type=click.Path(exists=True, path_type=Path),
+    help="JSON results of an earlier run to compare with",
+)
+def main(sizes, repeat, output, compare):
+    """Benchmark the workbook pipeline on synthetic workbooks."""
+    logger.remove()
+    sizes = list(sizes) or list(SIZES)
+    for size in sizes:
+        sheets, columns, years = SIZES[size]
+        click.echo(f"{size}: {sheets} sheets x {columns} columns x {years} years")
+    results = run_benchmarks(sizes, repeat)
+    baseline = json.loads(compare.read_text(encoding="utf-8")) if compare else None
+    click.echo(format_table(results, baseline))
+    if output:
+        output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
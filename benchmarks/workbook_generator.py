@@ -0,0 +1,110 @@
+"""Generator of synthetic workbooks shaped like ``Oplaty.xlsm``."""
+
+import random
+import zipfile
+from datetime import datetime
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.comments import Comment
+from openpyxl.utils import get_column_letter
+
+from payment_sheet import add_months
+
+VBA_CONTENT_TYPE = "application/vnd.ms-office.vbaProject"
+XLSM_CONTENT_TYPE = "application/vnd.ms-excel.sheet.macroEnabled.main+xml"
+XLSX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"
+)
+VBA_RELATIONSHIP = (
+    '<Relationship Id="rIdVba" '
+    'Type="http://schemas.microsoft.com/office/2006/relationships/vbaProject" '
+    'Target="vbaProject.bin"/>'
+)
+ICONS = ("fa-home", "fa-bolt", "fa-phone", "fa-child", "fa-car", "fa-tint")
+
+
+def monitored_columns(columns: int) -> list[str]:
+    """Return letters of ``columns`` category columns, three cells apart.
+
+    Column A holds the month and B its sum, so categories start at C.
+    """
+    return [get_column_letter(3 + 3 * i) for i in range(columns)]
+
+
+def generate_workbook(
+    sheets: int = 2,
+    columns: int = 4,
+    years: int = 2,
+    vba_size: int = 64 * 1024,
+    seed: int = 0,
+) -> tuple[bytes, dict[str, list[str]]]:
+    """Build a macro-enabled workbook and its ``monitored_sheets`` mapping.
+
+    Every sheet has one row per month for ``years`` years ending with the
+    current month, which is left unpaid; earlier months are paid. A
+    ``vbaProject.bin`` part of ``vba_size`` random bytes is added, so saving
+    with ``keep_vba`` carries the same payload as the real file.
+    """
+    rng = random.Random(seed)
+    now = datetime.now()
+    current = datetime(now.year, now.month, 1)
+    months = [add_months(current, -i) for i in reversed(range(12 * years))]
+    letters = monitored_columns(columns)
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    monitored_sheets: dict[str, list[str]] = {}
+    for sheet_number in range(sheets):
+        worksheet = workbook.create_sheet(f"Sheet{sheet_number + 1}")
+        worksheet["A1"] = "Date"
+        worksheet["B1"] = "Sum"
+        for column_number, letter in enumerate(letters):
+            worksheet[f"{letter}1"] = f"Category {column_number + 1}"
+            worksheet[f"{letter}1"].comment = Comment(
+                ICONS[column_number % len(ICONS)], "findog"
+            )
+        for row, month in enumerate(months, start=2):
+            worksheet.cell(row, 1, month).number_format = "yyyy-mm"
+            sum_cells = ",".join(f"{letter}{row}" for letter in letters)
+            worksheet.cell(row, 2, f"=SUM({sum_cells})")
+            for column_number in range(columns):
+                column = 3 + 3 * column_number
+                worksheet.cell(row, column, round(rng.uniform(20, 2000), 2))
+                worksheet.cell(row, column + 1, int(month < current))
+                due = month.replace(day=rng.randint(1, 28))
+                worksheet.cell(row, column + 2, due).number_format = "yyyy-mm-dd"
+        monitored_sheets[worksheet.title] = letters
+    stream = BytesIO()
+    workbook.save(stream)
+    return _add_vba_project(stream.getvalue(), rng.randbytes(vba_size)), (
+        monitored_sheets
+    )
+
+
+def _add_vba_project(xlsx: bytes, vba_project: bytes) -> bytes:
+    """Turn an xlsx archive into an xlsm one carrying ``vba_project``."""
+    source = zipfile.ZipFile(BytesIO(xlsx))
+    target_stream = BytesIO()
+    with zipfile.ZipFile(target_stream, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            data = source.read(item.filename)
+            if item.filename == "[Content_Types].xml":
+                data = (
+                    data.decode("utf-8")
+                    .replace(XLSX_CONTENT_TYPE, XLSM_CONTENT_TYPE)
+                    .replace(
+                        "</Types>",
+                        '<Override PartName="/xl/vbaProject.bin" '
+                        f'ContentType="{VBA_CONTENT_TYPE}"/></Types>',
+                    )
+                    .encode("utf-8")
+                )
+            elif item.filename == "xl/_rels/workbook.xml.rels":
+                data = (
+                    data.decode("utf-8")
+                    .replace("</Relationships>", VBA_RELATIONSHIP + "</Relationships>")
+                    .encode("utf-8")
+                )
+            target.writestr(item, data)
+        target.writestr("xl/vbaProject.bin", vba_project)
+    return target_stream.getvalue()
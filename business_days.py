@@ -0,0 +1,74 @@
+"""Business-day calendar with Polish public holidays."""
+
+from datetime import date, timedelta
+from functools import cache
+
+import numpy as np
+
+FIRST_YEAR = 2000
+LAST_YEAR = 2100
+
+
+def easter_sunday(year: int) -> date:
+    """Return Easter Sunday of a year (anonymous Gregorian algorithm)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def polish_holidays(year: int) -> list[date]:
+    """Return statutory public holidays in Poland for a year."""
+    easter = easter_sunday(year)
+    holidays = [
+        date(year, 1, 1),
+        easter,
+        easter + timedelta(days=1),  # Easter Monday
+        date(year, 5, 1),
+        date(year, 5, 3),
+        easter + timedelta(days=49),  # Pentecost
+        easter + timedelta(days=60),  # Corpus Christi
+        date(year, 8, 15),
+        date(year, 11, 1),
+        date(year, 11, 11),
+        date(year, 12, 25),
+        date(year, 12, 26),
+    ]
+    if year >= 2011:
+        holidays.append(date(year, 1, 6))  # Epiphany
+    if year >= 2025:
+        holidays.append(date(year, 12, 24))  # Christmas Eve
+    return sorted(holidays)
+
+
+@cache
+def holiday_calendar(
+    first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR
+) -> np.busdaycalendar:
+    """Return a Mon-Fri calendar with Polish holidays, built once per range."""
+    holidays = [
+        day
+        for year in range(first_year, last_year + 1)
+        for day in polish_holidays(year)
+    ]
+    return np.busdaycalendar(weekmask='1111100', holidays=holidays)
+
+
+def busday_count(begin, end) -> np.ndarray:
+    """Count business days in ``[begin, end)`` for scalars or date arrays.
+
+    Works like ``np.busday_count`` (negative when ``end`` precedes
+    ``begin``) but skips Polish public holidays.
+    """
+    return np.busday_count(
+        np.asarray(begin, dtype='datetime64[D]'),
+        np.asarray(end, dtype='datetime64[D]'),
+        busdaycal=holiday_calendar(),
+    )
@@ -1,15 +1,39 @@
 """Gmail SMTP adapter for sending HTML emails."""
 
 import smtplib
+import time
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from loguru import logger
+
+SEND_RETRIES = 2
+RETRY_DELAY = 1.0
+# recipients only go to the SMTP envelope, so they do not see each other
+UNDISCLOSED_RECIPIENTS = "undisclosed-recipients:;"
+
+
+def _is_permanent(code: int | None) -> bool:
+    """Whether an SMTP reply code rules out delivery on a later attempt."""
+    return code is not None and code >= 500
+
+
+def _error_codes(err: Exception, recipients: list[str]) -> dict[str, int | None]:
+    """Reply code of a failed send per recipient; None without a reply."""
+    if isinstance(err, smtplib.SMTPRecipientsRefused):
+        return {r: code for r, (code, _) in err.recipients.items()}
+    return dict.fromkeys(recipients, getattr(err, "smtp_code", None))
+
 
 class GmailAdapter:
     """Lightweight wrapper around Gmail SMTP over SSL."""
 
+    retry_delay: float = RETRY_DELAY
+
     def __init__(self, host: str, port: int, username: str, password: str):
         """Initialize connection details and create SMTP client."""
+        self.host = host
+        self.port = port
         self.username = username
         self.password = password
         self.server = smtplib.SMTP_SSL(host, port)
@@ -19,10 +43,60 @@ class GmailAdapter:
         self.server.ehlo()
         self.server.login(self.username, self.password)
 
-    def send_mail(self, recipient_email: str, subject: str, content: str):
-        """Send a single HTML email to the given recipient."""
-        message = self._compose_message(content, recipient_email, subject)
-        self.server.sendmail(self.username, recipient_email, message.as_string())
+    def send_mail_many(
+        self, recipients: list[str], subject: str, content: str
+    ) -> list[str]:
+        """Send one HTML email to all recipients; return those that failed.
+
+        The message is built once and sent in a single SMTP transaction.
+        Recipients the server refuses for now (4xx), or all of them if the
+        connection broke, are retried one by one, reconnecting as needed;
+        permanent refusals (5xx) are reported at once.
+        """
+        if not recipients:
+            return []
+        message = self._compose_message(
+            content, UNDISCLOSED_RECIPIENTS, subject
+        ).as_string()
+        try:
+            refused = self.server.sendmail(self.username, recipients, message)
+            codes = {r: code for r, (code, _) in refused.items()}
+        except (smtplib.SMTPException, OSError) as err:
+            logger.warning(f"Sending mail to all recipients failed: {err}")
+            codes = _error_codes(err, recipients)
+        failed = []
+        for recipient, code in codes.items():
+            if _is_permanent(code):
+                logger.warning(f"Mail to {recipient} refused permanently ({code})")
+                failed.append(recipient)
+            elif not self._send_again(recipient, message):
+                failed.append(recipient)
+        return failed
+
+    def _send_again(self, recipient: str, message: str) -> bool:
+        """Retry delivery of an already built message to one recipient."""
+        for attempt in range(1, SEND_RETRIES + 1):
+            time.sleep(self.retry_delay * attempt)
+            try:
+                self.server.sendmail(self.username, [recipient], message)
+                return True
+            except smtplib.SMTPServerDisconnected as err:
+                logger.warning(f"Mail to {recipient} failed ({attempt}): {err}")
+                self._reconnect()
+            except (smtplib.SMTPException, OSError) as err:
+                logger.warning(f"Mail to {recipient} failed ({attempt}): {err}")
+                if _is_permanent(_error_codes(err, [recipient]).get(recipient)):
+                    return False
+        return False
+
+    def _reconnect(self):
+        """Replace a broken connection with a new, logged in one."""
+        try:
+            self.server.close()
+            self.server = smtplib.SMTP_SSL(self.host, self.port)
+            self.login()
+        except (smtplib.SMTPException, OSError) as err:
+            logger.warning(f"Cannot reconnect to {self.host}: {err}")
 
     def _compose_message(self, content, recipient_email, subject):
         """Build a MIME message with HTML body."""
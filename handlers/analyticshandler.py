@@ -4,10 +4,10 @@ import datetime
 import os
 import shutil
 
-import matplotlib.pyplot as plt
 import pandas as pd
 from loguru import logger
 from matplotlib import rcParams
+from matplotlib.figure import Figure
 
 import anaytics
 from handlers.context import HandlerContext
@@ -20,16 +20,16 @@ PLOT_DIR = 'plots'
 
 def plot(data: pd.DataFrame, column, filename: str) -> None:
     """Plot a single series to a PNG file."""
-    plt.figure(figsize=(12, 4))
-    plt.grid(color='#F2F2F2', alpha=1, zorder=0)
-    plt.plot(data.index, data[column], color='#087E8B', lw=1, zorder=5)
-    plt.title(column, fontsize=17)
-    plt.xlabel('Period', fontsize=13)
-    plt.xticks(fontsize=9)
-    plt.ylabel('Amount', fontsize=13)
-    plt.yticks(fontsize=9)
-    plt.savefig(filename, dpi=300, bbox_inches='tight', pad_inches=0)
-    plt.close()
+    fig = Figure(figsize=(12, 4))
+    ax = fig.add_subplot()
+    ax.grid(color='#F2F2F2', alpha=1, zorder=0)
+    ax.plot(data.index, data[column], color='#087E8B', lw=1, zorder=5)
+    ax.set_title(column, fontsize=17)
+    ax.set_xlabel('Period', fontsize=13)
+    ax.tick_params(axis='x', labelsize=9)
+    ax.set_ylabel('Amount', fontsize=13)
+    ax.tick_params(axis='y', labelsize=9)
+    fig.savefig(filename, dpi=300, bbox_inches='tight', pad_inches=0)
     return
 
 
@@ -76,18 +76,14 @@ class AnalyticsHandler(AbstractHandler):
                 # vector = row.iloc[0]
                 vector = row.transpose()
                 vector.to_html("output.html")
-                ax = vector.plot(
-                    kind="bar",
-                    y=generate__current_index(),
-                    # autopct='%1.1f%%',
-                    # shadow=True,
-                    # colors=colors,
-                    # ylabel = "",
-                    # labeldistance=None,
-                    legend=True,
-                )
+                current = generate__current_index()
+                # not pyplot: its global state is unsafe on scheduler threads
+                fig = Figure()
+                ax = fig.add_subplot()
+                ax.bar(vector.index.astype(str), vector[current], label=str(current))
+                ax.tick_params(axis='x', labelrotation=90)
                 ax.legend(bbox_to_anchor=(1, 1.02), loc='upper left')
-                plt.savefig(
+                fig.savefig(
                     "/data/output.png", dpi=300, bbox_inches='tight', pad_inches=0
                 )
                 logger.info("Analytics completed")
@@ -1,10 +1,15 @@
 """Execution context passed between handlers in the pipeline."""
 
 import os
+import threading
 
 from api_clients.dropbox_client import DropboxClient
+from api_clients.page_archive import PageArchive
+from api_clients.parse_cache import ParseCache
+from api_clients.session_store import SessionStore
 from payment_book import PaymentBook
 from pushover import Pushover
+from run_metrics import RunMetrics
 from settings import Settings
 
 
@@ -13,7 +18,12 @@ class HandlerContext:
 
     def __init__(self, settings: Settings, silent: bool = False):
         """Create a context initialized from given Settings object."""
-        self.dropbox_client = DropboxClient(settings.dropbox_apikey)
+        self.dropbox_client = DropboxClient(
+            settings.dropbox_apikey, cache_dir=settings.data_dir / "cache"
+        )
+        self.session_store = SessionStore(settings.data_dir / "sessions")
+        self.page_archive = PageArchive(settings.data_dir / "pages")
+        self.parse_cache = ParseCache(settings.data_dir / "parse_cache")
         self.pushover = Pushover(settings.pushover_apikey, settings.pushover_user)
         self.payment_book = PaymentBook(settings.monitored_sheets)
         self.excel_dropbox_path = settings.excel_dropbox_path
@@ -31,6 +41,23 @@ class HandlerContext:
         self.statuses: list[str] = []
         self.nju_credentials = [c.model_dump() for c in settings.nju_credentials]
         self.no_excel = False
+        self.file_object: bytes | None = None
+        self.output_bytes: bytes | None = None
+        # file writes left running by handlers, joined by ``join_background``
+        self.background_writes: list[threading.Thread] = []
+        self.metrics = RunMetrics()
+
+    def join_background(self):
+        """Wait for background writes; re-raise the first one that failed."""
+        errors = []
+        for write in self.background_writes:
+            try:
+                write.join()
+            except OSError as err:
+                errors.append(err)
+        self.background_writes = []
+        if errors:
+            raise errors[0]
 
     @property
     def excel_file_name(self):
@@ -13,7 +13,9 @@ class EkartotekaHandler(AbstractHandler):
     def handle(self, context: HandlerContext) -> HandlerContext:
         """Fetch payment data and update payment book; log status."""
         logger.info("Ekartoteka")
-        ekartoteka_client = Ekartoteka(context.ekartoteka_credentials)
+        ekartoteka_client = Ekartoteka(
+            context.ekartoteka_credentials, session_store=context.session_store
+        )
         ekartoteka_client.login()
         result = ekartoteka_client.get_payment_status()
 
@@ -19,6 +19,9 @@ class EneaHandler(AbstractHandler):
             enea = Enea(
                 context.enea_credentials["username"],
                 context.enea_credentials["password"],
+                session_store=context.session_store,
+                archive=context.page_archive,
+                parse_cache=context.parse_cache,
             )
             enea.login()
             enea_results: EneaResults = enea.get_data()
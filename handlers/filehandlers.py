@@ -1,12 +1,16 @@
 """Handlers for file download, processing, notifications and commits."""
 
+import os
 import sys
+import threading
 
+import numpy as np
 from loguru import logger
 
 from handlers.context import HandlerContext
 from handlers.handler import AbstractHandler
 from payment_list_item import PaymentListItem
+from payment_status import DUE_SOON
 
 
 class FileDownloadHandler(AbstractHandler):
@@ -68,13 +72,13 @@ class NotifyOngoingHandler(AbstractHandler):
         """Build a message of imminent payments and notify if any exist."""
         logger.info("Notify payments payable in 2 days")
         pmt_list: list[PaymentListItem] = context.payment_book.payment_list
+        due_soon = np.flatnonzero(context.payment_book.status & DUE_SOON)
         payload: str = ""
         i: int = 0
-        for item in pmt_list:
-            if item.payment.due_soon_or_overdue:
-                new_str = str(item) + "\n"
-                payload += new_str
-                i += 1
+        for index in due_soon:
+            new_str = str(pmt_list[index]) + "\n"
+            payload += new_str
+            i += 1
         if i > 0:
             context.pushover.notify(payload)
         if i == 0:
@@ -87,14 +91,66 @@ class NotifyOngoingHandler(AbstractHandler):
         return "Notify Ongoing Payments"
 
 
+def _write_file(path: str, data: bytes):
+    """Write bytes to a local file."""
+    try:
+        with open(path, "wb") as file:
+            file.write(data)
+        logger.info(f"File: {os.path.basename(path)} saved")
+    except OSError:
+        logger.exception("Problem with saving file locally")
+        raise
+
+
+class BackgroundWrite(threading.Thread):
+    """Writes a file on a thread; ``join`` re-raises a failed write."""
+
+    def __init__(self, path: str, data: bytes):
+        """Prepare writing ``data`` to ``path``."""
+        super().__init__(name="save-file-locally")
+        self._path = path
+        self._data = data
+        self.error: OSError | None = None
+
+    def run(self):
+        """Write the file, keeping the error for ``join``."""
+        try:
+            _write_file(self._path, self._data)
+        except OSError as err:
+            self.error = err
+
+    def join(self, timeout=None):
+        """Wait for the write and raise its error, if any."""
+        super().join(timeout)
+        if self.error is not None:
+            raise self.error
+
+
 class SaveFileLocallyHandler(AbstractHandler):
-    """Save the modified workbook to a local path."""
+    """Serialize the modified workbook once and save it to a local path.
+
+    The serialized bytes are kept in ``context.output_bytes`` for the commit
+    step; with ``run_in_background`` the disk write does not block the chain
+    and is added to ``context.background_writes`` to be joined at the end.
+    """
+
+    run_in_background: bool = False
 
     def handle(self, context: HandlerContext) -> HandlerContext:
-        """Write workbook to disk and continue the chain."""
+        """Serialize workbook, write it to disk and continue the chain."""
+        if not context.payment_book.changed:
+            logger.info("Workbook unchanged - skipping local save")
+            return super().handle(context)
         logger.info("Saving file locally")
-        context.payment_book.save_to_file(filename=context.excel_local_path)
-        logger.info(f"File: {context.excel_file_name} saved")
+        changes = context.payment_book.changes
+        logger.info(f"Changed cells: {changes}")
+        context.output_bytes = context.payment_book.to_bytes()
+        if self.run_in_background:
+            write = BackgroundWrite(context.excel_local_path, context.output_bytes)
+            context.background_writes.append(write)
+            write.start()
+        else:
+            _write_file(context.excel_local_path, context.output_bytes)
         return super().handle(context)
 
     def __str__(self):
@@ -103,14 +159,26 @@ class SaveFileLocallyHandler(AbstractHandler):
 
 
 class FileCommitHandler(AbstractHandler):
-    """Commit the local workbook file back to Dropbox."""
+    """Commit the workbook back to Dropbox."""
 
     def handle(self, context: HandlerContext) -> HandlerContext:
-        """Upload local file to Dropbox, then continue the chain."""
+        """Upload the workbook to Dropbox, then continue the chain.
+
+        Bytes serialized by ``SaveFileLocallyHandler`` are uploaded directly;
+        the local file is read back only when they are not available.
+        """
+        if not context.payment_book.changed:
+            logger.info("Workbook unchanged - skipping commit")
+            return super().handle(context)
         logger.info("Committing file")
-        context.dropbox_client.commit_file(
-            context.excel_local_path, context.excel_dropbox_path
-        )
+        if context.output_bytes is not None:
+            context.dropbox_client.commit_file_bytes(
+                context.output_bytes, context.excel_dropbox_path
+            )
+        else:
+            context.dropbox_client.commit_file(
+                context.excel_local_path, context.excel_dropbox_path
+            )
         logger.info(f"file: {context.excel_file_name} committed")
         return super().handle(context)
 
@@ -20,6 +20,9 @@ class IPrzedszkoleHandler(AbstractHandler):
                 context.iprzedszkole_credentials["kindergarten"],
                 context.iprzedszkole_credentials["username"],
                 context.iprzedszkole_credentials["password"],
+                session_store=context.session_store,
+                archive=context.page_archive,
+                parse_cache=context.parse_cache,
             )
             iprzedszkole.login()
             result: Receivables = iprzedszkole.get_receivables()
@@ -16,7 +16,7 @@ class MailingHandler(AbstractHandler):
         """Render report HTML and optionally send emails."""
 
         mailer = Mailer(context.gmail_user, context.gmail_pass, context.payment_book)
-        mailer.statuses = context.statuses
+        mailer.statuses = context.statuses + [context.metrics.summary()]
         # noinspection PyBroadException
         try:
             mailer.login()
@@ -25,10 +25,14 @@ class MailingHandler(AbstractHandler):
             logger.info("Rendering completed")
             if not self.run_dry:
                 logger.info(f"There are {len(context.recipients)} mail(s) to send")
-                for recipient in context.recipients:
-                    mailer.send(recipient, payload)
-                    logger.info(f"mail to {recipient} send")
-                logger.info("sending mail completed")
+                failed = mailer.send_all(context.recipients, payload)
+                for recipient in failed:
+                    logger.error(f"mail to {recipient} not sent")
+                    context.pushover.error(f"Mail to {recipient} not sent")
+                logger.info(
+                    f"sending mail completed, "
+                    f"{len(context.recipients) - len(failed)} delivered"
+                )
             else:
                 with open("/data/output_mail.html", "wb") as html_file:
                     html_file.write(payload.encode('utf-8'))
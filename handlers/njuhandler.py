@@ -1,5 +1,6 @@
 """Handler that integrates with Nju billing to update payments."""
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from loguru import logger
@@ -10,12 +11,31 @@ from api_clients.nju_client import (
     filter_not_paid,
     print_summary,
 )
+from api_clients.transport import POOL_PER_HOST
 from handlers.context import HandlerContext
 from handlers.handler import AbstractHandler
+from run_metrics import in_current_context
+
+# all accounts log in to the same host; stay within its connection pool
+PARALLEL_ACCOUNTS = POOL_PER_HOST
+
+
+def poll_account(account: dict) -> dict:
+    """Log in to one Nju account and fetch its invoices."""
+    client: Nju = account["client"]
+    client.login()
+    account["invoices"] = client.parse_html()
+    account["invoices_current"] = filter_by_current_period(account["invoices"])
+    account["invoices_payable"] = filter_not_paid(account["invoices"])
+    return account
 
 
 class NjuHandler(AbstractHandler):
-    """Fetch invoices from Nju and update the payment book accordingly."""
+    """Fetch invoices from Nju and update the payment book accordingly.
+
+    Accounts are polled concurrently; their results are applied in the
+    configured order and a failing account does not affect the others.
+    """
 
     def handle(self, context: HandlerContext) -> HandlerContext:
         """Process all configured Nju accounts and update the sheet."""
@@ -23,47 +43,42 @@ class NjuHandler(AbstractHandler):
         try:
             queue_accounts = []
             for account in context.nju_credentials:
-                nju_client = Nju(account["phone"], account["password"])
+                nju_client = Nju(
+                    account["phone"],
+                    account["password"],
+                    session_store=context.session_store,
+                    archive=context.page_archive,
+                    parse_cache=context.parse_cache,
+                )
                 account_dict = {
                     "client": nju_client,
                     "sheet": account["sheet"],
                     "category": account["cat"],
                 }
                 queue_accounts.append(account_dict)
+            with ThreadPoolExecutor(max_workers=PARALLEL_ACCOUNTS) as pool:
+                futures = [
+                    pool.submit(in_current_context(poll_account), account)
+                    for account in queue_accounts
+                ]
             log_str = "Nju:"
-            for account in queue_accounts:
-                account["client"].login()
-                account["client"].write2file()
-                account["invoices"] = account["client"].parse_html()
-                account["invoices_current"] = filter_by_current_period(
-                    account["invoices"]
-                )
-                account["invoices_payable"] = filter_not_paid(account["invoices"])
+            for account, future in zip(queue_accounts, futures, strict=True):
+                phone = account["client"].phone_nmb
+                try:
+                    future.result()
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    logger.exception(f"Problem with nju {phone}", exc_info=e)
+                    context.pushover.error(f"Problem with nju {phone}")
+                    log_str += f"{{phone:{phone} - failed}}"
+                    continue
                 log_str += "{"
-                log_str += f"phone:{account['client'].phone_nmb} - "
+                log_str += f"phone:{phone} - "
                 log_str += print_summary(
                     account["invoices_payable"], text_if_none="no unpaid invoices"
                 )
                 log_str += "}"
                 if not context.no_excel:
-                    if len(account["invoices_current"]) > 0:
-                        total: float = 0.0
-                        paid: bool = True
-                        due_date = datetime.combine(
-                            account["invoices_current"][0].due_date, datetime.min.time()
-                        )
-                        for invoice in account["invoices_current"]:
-                            total += invoice.total()
-                            if not invoice.status_bool:
-                                paid = False
-                        context.payment_book.update_current_payment(
-                            sheet_name=account["sheet"],
-                            category_name=account["category"],
-                            amount=total,
-                            paid=paid,
-                            due_date=due_date,
-                            force_unpaid=True,
-                        )
+                    self._update_payment(context, account)
 
             logger.info(log_str)
             context.statuses.append(log_str)
@@ -72,5 +87,26 @@ class NjuHandler(AbstractHandler):
             context.pushover.error("Problem with nju")
         return super().handle(context)
 
+    @staticmethod
+    def _update_payment(context: HandlerContext, account: dict):
+        if len(account["invoices_current"]) > 0:
+            total: float = 0.0
+            paid: bool = True
+            due_date = datetime.combine(
+                account["invoices_current"][0].due_date, datetime.min.time()
+            )
+            for invoice in account["invoices_current"]:
+                total += invoice.total()
+                if not invoice.status_bool:
+                    paid = False
+            context.payment_book.update_current_payment(
+                sheet_name=account["sheet"],
+                category_name=account["category"],
+                amount=total,
+                paid=paid,
+                due_date=due_date,
+                force_unpaid=True,
+            )
+
     def __str__(self):
         return "Nju"
@@ -0,0 +1,180 @@
+"""Dependency-aware scheduler running independent handlers concurrently."""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from loguru import logger
+
+from handlers.context import HandlerContext
+from handlers.handler import AbstractHandler, Handler
+
+
+class DeferredPaymentBook:
+    """Payment book proxy that records updates instead of applying them."""
+
+    def __init__(self, payment_book):
+        """Wrap the shared payment book."""
+        self._payment_book = payment_book
+        self.updates: list[tuple[tuple, dict]] = []
+
+    def update_current_payment(self, *args, **kwargs):
+        """Queue an update to be applied when the branch is merged."""
+        self.updates.append((args, kwargs))
+
+    def __getattr__(self, name):
+        """Delegate everything else to the shared payment book."""
+        return getattr(self._payment_book, name)
+
+
+class BranchContext:
+    """View of a HandlerContext given to one handler run by the scheduler.
+
+    Attribute reads and writes go to the shared context, except that status
+    messages and payment updates are buffered until ``merge``, so handlers
+    running at the same time leave a deterministic trace.
+    """
+
+    def __init__(self, context: HandlerContext):
+        """Start a branch from the current state of the shared context."""
+        object.__setattr__(self, "_context", context)
+        object.__setattr__(self, "_base_statuses", len(context.statuses))
+        object.__setattr__(self, "statuses", list(context.statuses))
+        object.__setattr__(
+            self, "payment_book", DeferredPaymentBook(context.payment_book)
+        )
+        object.__setattr__(self, "proceeded", False)
+
+    def __getattr__(self, name):
+        """Read attributes from the shared context."""
+        return getattr(self._context, name)
+
+    def __setattr__(self, name, value):
+        """Write attributes to the shared context."""
+        setattr(self._context, name, value)
+
+    def proceed(self):
+        """Mark that the handler passed the context on to its successors."""
+        object.__setattr__(self, "proceeded", True)
+
+    def merge(self):
+        """Apply buffered statuses and payment updates to the shared context."""
+        self._context.statuses.extend(self.statuses[self._base_statuses :])
+        for args, kwargs in self.payment_book.updates:
+            self._context.payment_book.update_current_payment(*args, **kwargs)
+
+
+class _Proceed(AbstractHandler):
+    """Terminal handler recording that the previous handler continued."""
+
+    def handle(self, context: HandlerContext) -> HandlerContext:
+        context.proceed()
+        return context
+
+    def __str__(self):
+        return "Scheduler"
+
+
+class _Node:
+    """A handler with the nodes it depends on."""
+
+    def __init__(self, handler: Handler, depends_on: list["_Node"]):
+        self.handler = handler
+        self.depends_on = depends_on
+        self.future: Future | None = None
+        self.branch: BranchContext | None = None
+        self.merged = False
+        self.stopped = False
+        self.skipped = False
+
+
+class Scheduler:
+    """Run handlers as a DAG instead of a single chain of responsibility.
+
+    Handlers are added in a topological order with the handlers they depend
+    on. A handler starts once all its dependencies have finished and passed
+    the context on; handlers that stop the chain (return without calling
+    the next handler) cause their dependents to be skipped. Buffered results
+    are merged into the shared context in the order handlers were added.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """Create an empty graph run with at most ``max_workers`` threads."""
+        self.max_workers = max_workers
+        self._nodes: list[_Node] = []
+        self._by_handler: dict[int, _Node] = {}
+
+    def add(self, handler: Handler, after: list[Handler] = ()) -> Handler:
+        """Add a handler depending on already added handlers; return it."""
+        depends_on = []
+        for dependency in after:
+            node = self._by_handler.get(id(dependency))
+            if node is None:
+                raise ValueError(f"{dependency} must be added before {handler}")
+            depends_on.append(node)
+        handler.set_next(_Proceed())
+        node = _Node(handler, depends_on)
+        self._nodes.append(node)
+        self._by_handler[id(handler)] = node
+        logger.info(
+            f"Handler: {handler} - after {[str(d.handler) for d in depends_on]}"
+        )
+        return handler
+
+    @staticmethod
+    def _run_node(node: _Node, context: HandlerContext) -> BranchContext:
+        branch = BranchContext(context)
+        with context.metrics.measure(str(node.handler)) as record:
+            node.handler.handle(branch)
+            if not branch.proceeded:
+                record.status = "stopped"
+        return branch
+
+    @staticmethod
+    def _ready(node: _Node) -> bool:
+        return (
+            node.future is None
+            and not node.skipped
+            and all(d.merged and not d.stopped for d in node.depends_on)
+        )
+
+    def _merge_finished(self, position: int) -> int:
+        """Merge finished branches in declaration order; return new position."""
+        while position < len(self._nodes):
+            node = self._nodes[position]
+            if node.future is None and any(
+                d.skipped or d.stopped for d in node.depends_on
+            ):
+                logger.info(f"Handler {node.handler} skipped")
+                node.skipped = True
+            elif node.branch is None:
+                break
+            else:
+                node.branch.merge()
+                node.merged = True
+                if not node.branch.proceeded:
+                    logger.info(f"Handler {node.handler} stopped the pipeline")
+                    node.stopped = True
+            position += 1
+        return position
+
+    def run(self, context: HandlerContext) -> HandlerContext:
+        """Execute the graph on ``context`` and return it."""
+        position = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                for node in self._nodes:
+                    if node.branch is None and node.future and node.future.done():
+                        # re-raises handler errors (including sys.exit)
+                        node.branch = node.future.result()
+                position = self._merge_finished(position)
+                for node in self._nodes:
+                    if self._ready(node):
+                        node.future = pool.submit(self._run_node, node, context)
+                running = [
+                    n.future
+                    for n in self._nodes
+                    if n.future is not None and n.branch is None
+                ]
+                if not running:
+                    break
+                wait(running, return_when=FIRST_COMPLETED)
+        return context
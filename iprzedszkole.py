@@ -3,12 +3,20 @@
 import datetime
 import json
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import NamedTuple
 
-import requests
 from bs4 import BeautifulSoup
+from loguru import logger
 
 from api_clients.client import Client
+from api_clients.page_archive import PageArchive
+from api_clients.parse_cache import ParseCache
+from api_clients.session_store import DEFAULT_MAX_AGE, SessionStore
+from api_clients.transport import Transport, default_transport
+from run_metrics import in_current_context
 
 
 def _extract_amounts_main(bs, ident):
@@ -70,6 +78,60 @@ def _determine_year_start():
     return year - delta
 
 
+def parse_receivables(annual: bytes, details: bytes, today: datetime.date):
+    """Build Receivables from the annual report and fee details responses."""
+    data1 = json.loads(annual)  # klasycznie 'd' od ASP.NET AJAX
+    periods = data1["d"]["ListData"]
+
+    # wybierz rekord dla obecnego miesiąca/roku
+    month = today.month
+    year = today.year
+    amounts_summary = next(
+        (
+            p
+            for p in periods
+            if int(p.get("Rok", 0)) == year and int(p.get("Miesiac", 0)) == month
+        ),
+        None,
+    )
+    if amounts_summary is None:
+        # fallback: weź najnowszy dostępny okres (gdy brak bieżącego)
+        amounts_summary = max(
+            periods, key=lambda p: (int(p.get("Rok", 0)), int(p.get("Miesiac", 0)))
+        )
+
+    summary_to_pay = amounts_summary["DoZaplaty"]
+    summary_paid = amounts_summary["Zaplacono"]
+    summary_overdue = amounts_summary["Zaleglosc"]
+    summary_overpayment = amounts_summary["Nadplata"]
+
+    data2 = json.loads(details)
+    receivables = data2["d"]["ListK"]
+
+    costs_fixed = 0.0
+    costs_meal = 0.0
+    costs_additional = 0.0
+
+    for rec in receivables:
+        kind = rec.get("RodzajOplaty")
+        if kind == 0:
+            costs_fixed = rec["Kwota"]
+        elif kind == 1:
+            costs_additional = rec["Kwota"]
+        elif kind == 2:
+            costs_meal = rec["Kwota"]
+
+    return Receivables(
+        summary_to_pay=summary_to_pay,
+        summary_paid=summary_paid,
+        summary_overdue=summary_overdue,
+        summary_overpayment=summary_overpayment,
+        costs_fixed=costs_fixed,
+        costs_meal=costs_meal,
+        costs_additional=costs_additional,
+    )
+
+
 class Iprzedszkole(Client):
     """Session client for iPrzedszkole portal used to fetch data."""
 
@@ -98,8 +160,30 @@ class Iprzedszkole(Client):
         ),
     }
 
-    def __init__(self, kindergarten, login, password):
-        """Initialize with kindergarten name and credentials."""
+    SESSION_PORTAL = "iprzedszkole"
+    # child id and login form tokens outlive the session cookies
+    ACCOUNT_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+    def __init__(
+        self,
+        kindergarten,
+        login,
+        password,
+        session_store: SessionStore = None,
+        transport: Transport = None,
+        archive: PageArchive = None,
+        parse_cache: ParseCache = None,
+    ):
+        """Initialize with kindergarten name and credentials.
+
+        With a ``session_store`` the cookies, child id and login form tokens
+        of the last login are reused: a valid session needs no login at all,
+        and an expired one only the credentials POST.
+        Requests go through ``transport``, the shared one by default, and
+        the receivables responses are kept in ``archive`` if given. With a
+        ``parse_cache`` responses equal to the last run are not parsed again.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
         self.kindergartenName = kindergarten
         self.kindergartenLogin = login
         self.kindergartenPassword = password
@@ -108,18 +192,53 @@ class Iprzedszkole(Client):
         self.child_master_id = 0
         self.logged_in = False
         self.session = None
+        self.session_store = session_store
+        self._transport = transport or default_transport()
+        self.archive = archive
+        self.parse_cache = parse_cache
+        self._tokens: dict | None = None
+        self._session_resumed = False
+
+    @property
+    def _session_account(self) -> str:
+        return f"{self.kindergartenName}/{self.kindergartenLogin}"
+
+    def _restore_account(self):
+        """Load the child id, form tokens and, if still fresh, the cookies."""
+        stored = self.session_store.load(
+            self.SESSION_PORTAL,
+            self._session_account,
+            self.kindergartenPassword,
+            max_age=self.ACCOUNT_CACHE_MAX_AGE,
+        )
+        if stored is None:
+            return
+        self.child_master_id = stored.meta.get("child_master_id", 0)
+        self._tokens = stored.meta.get("tokens")
+        if self.child_master_id and time.time() - stored.saved < DEFAULT_MAX_AGE:
+            stored.restore(self.session.cookies)
+            self._session_resumed = True
 
     def login(self):
-        """Login sequence establishing a requests.Session with tokens."""
-        self.session = requests.Session()
-        self.session.headers.update(self.HEADERS)
+        """Prepare a session, logging in only if no stored session is usable.
+
+        A restored session is validated by the receivables requests
+        themselves; ``get_receivables`` logs in again if it was rejected.
+        """
+        self.session = self._transport.session(headers=self.HEADERS)
+        self._session_resumed = False
+        if self.session_store is not None:
+            self._restore_account()
+        if not self._session_resumed:
+            self._login_fresh()
+        self.logged_in = True
 
-        # 1) GET login page -> cookies + tokens
-        r1 = self.session.get(self.URL_BASE + self.URL_LOGIN, timeout=20)
-        r1.raise_for_status()
-        tokens = aspnet_tokens(r1.text)
+    def _post_credentials(self, tokens: dict) -> bool:
+        """POST the login form; return whether the portal accepted it.
 
-        # 2) POST credentials + tokens (+ referer!)
+        Stale form tokens are answered with an error page or the login form,
+        like wrong credentials, so a rejection does not tell them apart.
+        """
         payload = {
             **tokens,
             'ctl00$cphContent$txtDatabase': self.kindergartenName,
@@ -127,113 +246,125 @@ class Iprzedszkole(Client):
             'ctl00$cphContent$txtPassword': self.kindergartenPassword,
             'ctl00$cphContent$ButtonLogin': 'Zaloguj',
         }
-        r2 = self.session.post(
+        response = self.session.post(
             self.URL_BASE + self.URL_LOGIN,
             data=payload,
             headers={"Referer": self.URL_BASE + self.URL_LOGIN},
             timeout=20,
             allow_redirects=True,
         )
-        r2.raise_for_status()
-
-        r3 = self.session.get(self.URL_BASE + self.URL_MEAL_PLAN, timeout=20)
+        if not response.ok:
+            return False
+        return self.URL_LOGIN.lower() not in response.url.lower()
+
+    def _login_fresh(self):
+        """Log in with credentials, fetching only what is not cached."""
+        self.session.cookies.clear()
+        # cached tokens save the GET of the login page; if they are
+        # rejected, the cached account data is dropped and the credentials
+        # are tried once more with fresh tokens, never twice with those
+        if not self._tokens or not self._post_credentials(self._tokens):
+            self._tokens = None
+            self.child_master_id = 0
+            r1 = self.session.get(self.URL_BASE + self.URL_LOGIN, timeout=20)
+            r1.raise_for_status()
+            tokens = aspnet_tokens(r1.text)
+            if not self._post_credentials(tokens):
+                raise ConnectionError("iPrzedszkole rejected the credentials")
+            self._tokens = tokens
+
+        if not self.child_master_id:
+            r3 = self.session.get(self.URL_BASE + self.URL_MEAL_PLAN, timeout=20)
+            r3.raise_for_status()
+            child_master_id = re.search(
+                r'<option\s+selected="selected"\s+value="(\d+)">', r3.text
+            )
+            self.child_master_id = child_master_id.group(1)
+        if self.session_store is not None:
+            self.session_store.save(
+                self.SESSION_PORTAL,
+                self._session_account,
+                self.kindergartenPassword,
+                self.session.cookies,
+                meta={"child_master_id": self.child_master_id, "tokens": self._tokens},
+            )
 
-        child_master_id = re.search(
-            r'<option\s+selected="selected"\s+value="(\d+)">', r3.text
+    def _archive_response(self, name: str, response):
+        if self.archive is not None:
+            self.archive.store(f"{self.SESSION_PORTAL}/{name}", response.content)
+
+    def _post_asmx(self, url: str, payload: dict):
+        """POST to a receivables web service; None if the session expired."""
+        response = self.session.post(
+            self.URL_BASE + url,
+            data=json.dumps(payload),
+            headers={
+                "Content-Type": "application/json; charset=utf-8",
+                "X-Requested-With": "XMLHttpRequest",
+                "Referer": self.URL_BASE + self.URL_RECEIVABLES,
+            },
+            timeout=20,
         )
-        self.child_master_id = child_master_id.group(1)
-        self.logged_in = True
-
-    def get_receivables(self):
-        """Fetch receivables summary and detail, return a Receivables tuple."""
-        if not self.logged_in or not self.session:
-            raise ConnectionError("Najpierw wywołaj login().")
-
-        # Wejście na stronę należności (dobry 'Referer'/kontekst dla ASMX)
-        r0 = self.session.get(self.URL_BASE + self.URL_RECEIVABLES, timeout=20)
-        r0.raise_for_status()
-
-        headers = {
-            "Content-Type": "application/json; charset=utf-8",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": self.URL_BASE + self.URL_RECEIVABLES,
-        }
-
+        if response.status_code == 401 or (
+            self.URL_LOGIN.lower() in response.url.lower()
+        ):
+            return None
+        response.raise_for_status()
+        return response
+
+    def _fetch_receivables(self):
+        """Request the annual report and fee details at the same time."""
         # --- 1) Raport roczny -> wyciąg sum dla bieżącego miesiąca ---
-        year_start = _determine_year_start()
         payload_annual = {
             "args": {
                 "dzieckoId": int(self.child_master_id),
-                "rokStart": str(year_start),
+                "rokStart": str(_determine_year_start()),
                 "listViewName": "Szczegoly",
             }
         }
-        r1 = self.session.post(
-            self.URL_BASE + self.URL_RECEIVABLES_ANNUAL,
-            data=json.dumps(payload_annual),
-            headers=headers,
-            timeout=20,
-        )
-        r1.raise_for_status()
-        data1 = r1.json()  # klasycznie 'd' od ASP.NET AJAX
-        periods = data1["d"]["ListData"]
-
-        # wybierz rekord dla obecnego miesiąca/roku
-        today = datetime.date.today()
-        month = today.month
-        year = today.year
-        amounts_summary = next(
-            (
-                p
-                for p in periods
-                if int(p.get("Rok", 0)) == year and int(p.get("Miesiac", 0)) == month
-            ),
-            None,
-        )
-        if amounts_summary is None:
-            # fallback: weź najnowszy dostępny okres (gdy brak bieżącego)
-            amounts_summary = max(
-                periods, key=lambda p: (int(p.get("Rok", 0)), int(p.get("Miesiac", 0)))
-            )
-
-        summary_to_pay = amounts_summary["DoZaplaty"]
-        summary_paid = amounts_summary["Zaplacono"]
-        summary_overdue = amounts_summary["Zaleglosc"]
-        summary_overpayment = amounts_summary["Nadplata"]
-
         # --- 2) Szczegóły opłat (stała/posiłki/dodatkowe) ---
         payload_details = {
             "idDziecko": str(self.child_master_id)
         }  # ten endpoint nie używa 'args'
-        r2 = self.session.post(
-            self.URL_BASE + self.URL_RECEIVABLES_DATA,
-            data=json.dumps(payload_details),
-            headers=headers,
-            timeout=20,
-        )
-        r2.raise_for_status()
-        data2 = r2.json()
-        receivables = data2["d"]["ListK"]
-
-        costs_fixed = 0.0
-        costs_meal = 0.0
-        costs_additional = 0.0
-
-        for rec in receivables:
-            kind = rec.get("RodzajOplaty")
-            if kind == 0:
-                costs_fixed = rec["Kwota"]
-            elif kind == 1:
-                costs_additional = rec["Kwota"]
-            elif kind == 2:
-                costs_meal = rec["Kwota"]
-
-        return Receivables(
-            summary_to_pay=summary_to_pay,
-            summary_paid=summary_paid,
-            summary_overdue=summary_overdue,
-            summary_overpayment=summary_overpayment,
-            costs_fixed=costs_fixed,
-            costs_meal=costs_meal,
-            costs_additional=costs_additional,
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            annual = pool.submit(
+                in_current_context(self._post_asmx),
+                self.URL_RECEIVABLES_ANNUAL,
+                payload_annual,
+            )
+            details = pool.submit(
+                in_current_context(self._post_asmx),
+                self.URL_RECEIVABLES_DATA,
+                payload_details,
+            )
+        return annual.result(), details.result()
+
+    def get_receivables(self):
+        """Fetch receivables summary and detail, return a Receivables tuple."""
+        if not self.logged_in or not self.session:
+            raise ConnectionError("Najpierw wywołaj login().")
+
+        r1, r2 = self._fetch_receivables()
+        if (r1 is None or r2 is None) and self._session_resumed:
+            logger.info("Stored iPrzedszkole session expired, logging in")
+            self._session_resumed = False
+            self._login_fresh()
+            r1, r2 = self._fetch_receivables()
+        if r1 is None or r2 is None:
+            raise ConnectionError("iPrzedszkole session rejected")
+        self._archive_response("annual", r1)
+        self._archive_response("details", r2)
+
+        today = datetime.date.today()
+        parse = partial(parse_receivables, r1.content, r2.content, today)
+        if self.parse_cache is None:
+            return parse()
+        # the current month picks the period, so it is part of the key
+        result = self.parse_cache.get(
+            f"{self.SESSION_PORTAL}/{self._session_account}",
+            parse,
+            r1.content,
+            r2.content,
+            f"{today:%Y-%m}",
         )
+        return result
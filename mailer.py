@@ -1,8 +1,8 @@
 """Mailer that composes and sends daily payment reports via Gmail."""
 
-import datetime
 from math import floor
 
+import numpy as np
 from loguru import logger
 
 import payment_book as pb
@@ -11,6 +11,7 @@ from gmail_adapter import GmailAdapter
 from messages import DailyMessage
 from payment_book import PaymentBook
 from payment_list_item import PaymentListItem
+from payment_status import CURRENT_MONTH, PAID
 
 
 class Mailer(Client):
@@ -46,33 +47,21 @@ class Mailer(Client):
     def render(self) -> str:
         """Render HTML report for current and unpaid payments."""
         report = DailyMessage()
-        data = self.book.payment_list
-        data = pb.sort_payment_list_by_date(data)
-        today = datetime.datetime.now()
-        month = today.month
-        year = today.year
-        sum_total = sum(
-            payment_li.payment.amount
-            for payment_li in data
-            if payment_li.payment.due_date.year == year
-            and payment_li.payment.due_date.month == month
-        )
-        data2: list[PaymentListItem] = []
-        for pmt in data:
-            if not pmt.payment.paid:
-                data2.append(pmt)
-                if (
-                    pmt.payment.due_date.year != year
-                    or pmt.payment.due_date.month != month
-                ):
-                    sum_total += pmt.payment.amount
+        items = self.book.payment_list
+        store = self.book.store
+        status = self.book.status
+        current = (status & CURRENT_MONTH).astype(bool)
+        unpaid = (status & PAID) == 0
+        sum_total = float(store.amount[current | unpaid].sum())
         logger.info(f'Sum total: {sum_total} zł')
-        sum_unpaid = sum(payment_li.payment.amount for payment_li in data2)
+        sum_unpaid = float(store.amount[unpaid].sum())
         logger.info(f'Sum unpaid: {sum_unpaid} zł')
         progress = floor(((sum_total - sum_unpaid) / sum_total) * 100)
         logger.info(f'Progress: {progress} %')
 
-        data_json = pb.make_json_payments(data2)
+        order = np.argsort(store.due_date, kind='stable')
+        data2: list[PaymentListItem] = [items[i] for i in order[unpaid[order]]]
+        data_json = pb.make_json_payments(data2, as_of=self.book.as_of)
         return report.render(
             data=data_json,
             sum_total=sum_total,
@@ -81,11 +70,10 @@ class Mailer(Client):
             statuses=self.statuses,
         )
 
-    def send(self, recipient_email: str, content: str):
-        """Send the rendered HTML to a single recipient."""
-        if self.adapter is not None:
-            self.adapter.send_mail(
-                recipient_email=recipient_email,
-                subject="Findog Daily Report",
-                content=content,
-            )
+    def send_all(self, recipients: list[str], content: str) -> list[str]:
+        """Send the rendered HTML to all recipients; return the failed ones."""
+        return self.adapter.send_mail_many(
+            recipients=recipients,
+            subject="Findog Daily Report",
+            content=content,
+        )
@@ -1,10 +1,13 @@
 import os
 import sys
+import tempfile
 from pathlib import Path
 
 import click
 from loguru import logger
 
+from api_clients.replay import RecordingBackend, ReplayBackend
+from api_clients.transport import default_transport
 from handlers.analyticshandler import AnalyticsHandler
 from handlers.context import HandlerContext
 from handlers.ekartotekahandler import EkartotekaHandler
@@ -20,6 +23,7 @@ from handlers.handler import Handler
 from handlers.iprzedszkolehandler import IPrzedszkoleHandler
 from handlers.mailinghandler import MailingHandler
 from handlers.njuhandler import NjuHandler
+from handlers.scheduler import Scheduler
 from settings import Settings
 
 API_EKARTOTEKA = "ekartoteka"
@@ -50,19 +54,20 @@ logger.add(
 logger.add(sys.stdout, level="INFO")
 
 
-def get_handler(
-    current_handler: Handler | None, starter: Handler | None, new_handler: Handler
-):
-    if current_handler is None:
-        return new_handler, new_handler
-    else:
-        return current_handler.set_next(new_handler), starter
-
-
 def load_settings() -> Settings:
     return Settings.from_all()
 
 
+def http_secrets(settings: Settings) -> list[str]:
+    """Credential values scrubbed from recorded HTTP traffic."""
+    creds = [settings.ekartoteka, settings.enea, settings.przedszkole]
+    creds += settings.nju_credentials
+    values = [settings.pushover_apikey, settings.pushover_user]
+    for cred in creds:
+        values += [cred.username, cred.password, cred.phone]
+    return [value for value in values if value]
+
+
 @click.command(no_args_is_help=True)
 @click.option(
     "--enable-all",
@@ -105,6 +110,30 @@ def load_settings() -> Settings:
     help="Run without committing file to dropbox",
     default=False,
 )
+@click.option(
+    "--record-http",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Record portal traffic (credentials scrubbed) into this directory",
+)
+@click.option(
+    "--replay-http",
+    type=click.Path(exists=True, file_okay=False, path_type=Path),
+    help="Serve portal traffic recorded with '--record-http' instead of network",
+)
+@click.option(
+    "--replay-latency",
+    type=float,
+    default=0.0,
+    show_default=True,
+    help="Seconds added to every replayed response",
+)
+@click.option(
+    "--replay-jitter",
+    type=float,
+    default=0.0,
+    show_default=True,
+    help="Random +/- seconds added to the replay latency",
+)
 def main(
     enable_all,
     enable_dropbox,
@@ -113,10 +142,16 @@ def main(
     enable_api,
     enable_analytics,
     disable_commit,
+    record_http,
+    replay_http,
+    replay_latency,
+    replay_jitter,
 ):
     """
     A simple program to keep your payments in check
     """
+    # pylint: disable=too-many-arguments,too-many-positional-arguments
+    # pylint: disable=too-many-locals
     click.echo(
         click.style(
             'Findog - simple program to keep your payments in check',
@@ -135,46 +170,69 @@ def main(
     if enable_api_all:
         enable_api = (API_EKARTOTEKA, API_IPRZEDSZKOLE, API_ENEA, API_NJU)
     settings = load_settings()
+    metrics_dir = settings.data_dir / "metrics"
+    offline = replay_http is not None or record_http is not None
+    if offline:
+        # stored sessions and caches would change the requests made, and
+        # nothing may reach the real workbook, mailbox or phone
+        settings.data_dir = Path(tempfile.mkdtemp(prefix="findog-"))
+        logger.info(f"Offline run, using scratch data in {settings.data_dir}")
+        disable_commit = True
+    if replay_http is not None:
+        default_transport().backend = ReplayBackend(
+            replay_http, http_secrets(settings), replay_latency, replay_jitter
+        )
+    elif record_http is not None:
+        default_transport().backend = RecordingBackend(
+            record_http, http_secrets(settings)
+        )
     ctx = HandlerContext(silent=not enable_notification, settings=settings)
     notifier = NotifyOngoingHandler()
     mailer = MailingHandler()
-    mailer.run_dry = not enable_notification
+    mailer.run_dry = offline or not enable_notification
+    ctx.pushover.run_dry = offline
 
-    starter: Handler | None = None
-    handler: Handler | None = None
+    scheduler = Scheduler()
+    processed: list[Handler] = []
 
     if enable_dropbox:
-        starter = FileDownloadHandler()
-        handler = starter.set_next(FileProcessHandler())
+        downloader = scheduler.add(FileDownloadHandler())
+        processed = [scheduler.add(FileProcessHandler(), after=[downloader])]
     else:
         ctx.no_excel = True
 
+    pollers: list[Handler] = []
     if API_EKARTOTEKA in enable_api:
-        poller_ekartoteka = EkartotekaHandler()
-        handler, starter = get_handler(handler, starter, poller_ekartoteka)
+        pollers.append(scheduler.add(EkartotekaHandler(), after=processed))
     if API_IPRZEDSZKOLE in enable_api:
-        poller_iprzedszkole = IPrzedszkoleHandler()
-        handler, starter = get_handler(handler, starter, poller_iprzedszkole)
+        pollers.append(scheduler.add(IPrzedszkoleHandler(), after=processed))
     if API_ENEA in enable_api:
-        poller_enea = EneaHandler()
-        handler, starter = get_handler(handler, starter, poller_enea)
+        pollers.append(scheduler.add(EneaHandler(), after=processed))
     if API_NJU in enable_api:
-        poller_nju = NjuHandler()
-        handler, starter = get_handler(handler, starter, poller_nju)
+        pollers.append(scheduler.add(NjuHandler(), after=processed))
 
     if enable_dropbox:
+        polled = processed + pollers
+        reports: list[Handler] = []
         if enable_notification:
-            handler = handler.set_next(notifier)
-            handler = handler.set_next(mailer)
+            reports.append(scheduler.add(notifier, after=polled))
+            reports.append(scheduler.add(mailer, after=polled))
         if enable_analytics:
-            anal = AnalyticsHandler()
-            handler = handler.set_next(anal)
-        handler = handler.set_next(SaveFileLocallyHandler())
+            reports.append(scheduler.add(AnalyticsHandler(), after=polled))
+        saver = SaveFileLocallyHandler()
+        saver.run_in_background = True
+        scheduler.add(saver, after=polled + reports)
         if not disable_commit:
-            handler.set_next(FileCommitHandler())
+            scheduler.add(FileCommitHandler(), after=[saver])
     # Fire!!
-    if starter is not None:
-        starter.handle(ctx)
+    try:
+        scheduler.run(ctx)
+        ctx.join_background()
+    finally:
+        logger.info(ctx.metrics.summary())
+        logger.info(default_transport().summary())
+        ctx.metrics.save(metrics_dir)
+        ctx.page_archive.close()
 
 
 if __name__ == '__main__':
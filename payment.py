@@ -2,26 +2,82 @@
 
 from datetime import datetime, timedelta
 
-import numpy as np
+from business_days import busday_count
+from payment_store import PaymentStore
 
 
 class Payment:
-    """Represents a single payment entry with due date and status."""
+    """Represents a single payment entry with due date and status.
 
-    amount: float
-    paid: bool
-    excel_row: int
-    due_date: datetime
+    A payment is a thin view on one row of a ``PaymentStore``; payments
+    created on their own get a private single-row store.
+    """
 
-    def __init__(self, paid=False, due_date=None, amount=0.0, excel_row=0):
+    __slots__ = ('_store', '_index')
+
+    def __init__(self, paid=False, due_date=None, amount=0.0, excel_row=0, store=None):
         """Create a payment with defaults for status, date, amount and row.
 
         Note: avoid using datetime.now() as a default argument value.
         """
-        self.due_date = due_date or datetime.now()
-        self.amount: float = amount
-        self.paid: bool = paid
-        self.excel_row: int = excel_row
+        if store is None:
+            store = PaymentStore(capacity=1)
+        self._store = store
+        self._index = store.append(
+            amount=amount,
+            paid=paid,
+            due_date=due_date or datetime.now(),
+            excel_row=excel_row,
+        )
+
+    @classmethod
+    def view(cls, store: PaymentStore, index: int) -> 'Payment':
+        """Return a payment reading row ``index`` of an existing store."""
+        payment = cls.__new__(cls)
+        payment._store = store
+        payment._index = index
+        return payment
+
+    @property
+    def index(self) -> int:
+        """Row of this payment in its store."""
+        return self._index
+
+    @property
+    def amount(self) -> float:
+        """Payment amount."""
+        return float(self._store.amount[self._index])
+
+    @amount.setter
+    def amount(self, value: float):
+        self._store.amount[self._index] = value
+
+    @property
+    def paid(self) -> bool:
+        """True when the payment is marked as paid."""
+        return bool(self._store.paid[self._index])
+
+    @paid.setter
+    def paid(self, value: bool):
+        self._store.paid[self._index] = value
+
+    @property
+    def due_date(self) -> datetime:
+        """Payment due date."""
+        return self._store.due_date[self._index].item()
+
+    @due_date.setter
+    def due_date(self, value: datetime):
+        self._store.due_date[self._index] = value
+
+    @property
+    def excel_row(self) -> int:
+        """Workbook row the payment was read from."""
+        return int(self._store.excel_row[self._index])
+
+    @excel_row.setter
+    def excel_row(self, value: int):
+        self._store.excel_row[self._index] = value
 
     def __str__(self):
         """Return a human-readable description of the payment."""
@@ -62,5 +118,4 @@ class Payment:
     @property
     def b_days_left(self) -> int:
         """Business days left until due date."""
-        today = datetime.now()
-        return int(np.busday_count(f'{today:%Y-%m-%d}', f'{self.due_date:%Y-%m-%d}'))
+        return int(busday_count(datetime.now(), self.due_date))
@@ -1,13 +1,19 @@
 """Workbook access and operations for payments tracking."""
 
 from datetime import date, datetime
+from functools import partial
 from io import BytesIO
 
+import numpy as np
 from openpyxl import Workbook, load_workbook
-from openpyxl.cell import Cell
+from openpyxl.utils import column_index_from_string
 
+from business_days import busday_count
+from payment import Payment
 from payment_list_item import PaymentListItem
 from payment_sheet import PaymentSheet
+from payment_status import classify
+from payment_store import PaymentStore
 
 
 def sort_payment_list_by_date(
@@ -17,11 +23,18 @@ def sort_payment_list_by_date(
     return sorted(item_list, key=lambda x: x.payment.due_date, reverse=False)
 
 
-def make_json_payments(item_list: list[PaymentListItem]):
-    """Serialize list items into JSON-friendly list of dicts."""
+def make_json_payments(item_list: list[PaymentListItem], as_of: datetime = None):
+    """Serialize list items into JSON-friendly list of dicts.
+
+    Business days left are counted for all items in one batch call.
+    """
+    due_dates = np.array(
+        [item.payment.due_date for item in item_list], dtype='datetime64[D]'
+    )
+    days_left = busday_count(as_of or datetime.now(), due_dates).tolist()
     result = []
-    for item3 in item_list:
-        result.append(item3.to_dict())
+    for item3, b_days_left in zip(item_list, days_left, strict=True):
+        result.append(item3.to_dict(b_days_left=b_days_left))
     return result
 
 
@@ -30,30 +43,86 @@ class PaymentBook:
 
     _payment_sheets: dict[str, PaymentSheet] = None
     _workbook: Workbook = None
+    _file: bytes = None
     _monitored_sheets = None
+    _store: PaymentStore = None
+    _payment_list: list[PaymentListItem] = None
+    _status: np.ndarray = None
+    _comments_wb: Workbook = None
 
     def __init__(self, monitored_sheets):
         """Initialize with a map of monitored sheet names to column letters."""
         self._payment_sheets = {}
         self._monitored_sheets = monitored_sheets
+        self._store = PaymentStore()
+        self.as_of: datetime = datetime.now()
 
     def load_and_process(self, file: bytes):
-        """Load workbook from bytes and build internal structures."""
-        self._workbook = load_workbook(filename=BytesIO(file), keep_vba=True)
-        for sheet_name, monit_cats in self.monitored_sheets.items():
-            if sheet_name in self._workbook:
-                payment_sheet = PaymentSheet(
-                    self._workbook[sheet_name], sheet_name, monit_cats
-                )
-                current_row = payment_sheet.get_active_row
-                if current_row > 1:
-                    payment_sheet.populate_categories(current_row)
-                    payment_sheet.populate_next_month(current_row)
-                self._payment_sheets[sheet_name] = payment_sheet
+        """Scan workbook bytes read-only and build internal structures.
+
+        Status fills and the next month row are planned against the scanned
+        cells; the writable workbook is loaded lazily by ``workbook`` only
+        when those or later updates have to be written.
+        """
+        self._file = file
+        self._workbook = None
+        self._payment_sheets = {}
+        self._store = PaymentStore()
+        self._payment_list = None
+        self._status = None
+        self.as_of = datetime.now()
+        read_only_wb = load_workbook(filename=BytesIO(file), read_only=True)
+        try:
+            for sheet_name, monit_cats in self.monitored_sheets.items():
+                if sheet_name in read_only_wb:
+                    payment_sheet = PaymentSheet(
+                        None, sheet_name, monit_cats, store=self._store
+                    )
+                    payment_sheet.scan(
+                        read_only_wb[sheet_name],
+                        partial(self._comments_sheet, sheet_name),
+                    )
+                    current_row = payment_sheet.get_active_row
+                    if current_row > 1:
+                        payment_sheet.populate_categories(current_row)
+                    self._payment_sheets[sheet_name] = payment_sheet
+        finally:
+            read_only_wb.close()
+            self._comments_wb = None
+        for payment_sheet in self._payment_sheets.values():
+            if payment_sheet.active_row > 1:
+                payment_sheet.format_categories(self.status)
+                payment_sheet.populate_next_month(payment_sheet.active_row)
+
+    def _comments_sheet(self, sheet_name: str):
+        """Sheet of a normally loaded copy of the file, loaded at most once."""
+        if self._comments_wb is None:
+            self._comments_wb = load_workbook(filename=BytesIO(self._file))
+        return self._comments_wb[sheet_name]
+
+    @property
+    def loaded(self) -> bool:
+        """True once the writable workbook has been loaded."""
+        return self._workbook is not None
+
+    @property
+    def workbook(self) -> Workbook:
+        """Return the writable workbook, loading it and applying changes on demand."""
+        if self._workbook is None:
+            self._workbook = load_workbook(filename=BytesIO(self._file), keep_vba=True)
+            for sheet_name, payment_sheet in self._payment_sheets.items():
+                payment_sheet.bind(self._workbook[sheet_name])
+        return self._workbook
 
     def save_to_file(self, filename):
         """Persist current workbook to a file path."""
-        self._workbook.save(filename=filename)
+        self.workbook.save(filename=filename)
+
+    def to_bytes(self) -> bytes:
+        """Serialize the current workbook to bytes in memory."""
+        stream = BytesIO()
+        self.workbook.save(stream)
+        return stream.getvalue()
 
     def update_current_payment(
         self,
@@ -86,47 +155,85 @@ class PaymentBook:
         ):
             return
 
-        cell_amount: Cell = sheet.sheet[f'{cat.column}{pmt.excel_row}']
-        cell_paid: Cell = sheet.sheet.cell(
-            row=cell_amount.row, column=cell_amount.column + 1
-        )
-        cell_due_date: Cell = sheet.sheet.cell(
-            row=cell_amount.row, column=cell_amount.column + 2
-        )
+        row = pmt.excel_row
+        column = column_index_from_string(cat.column)
 
         if force_unpaid is None:
             force_unpaid = True
 
         if amount is not None:
             pmt.amount = amount
-            cell_amount.value = amount
+            sheet.write(row, column, value=amount)
 
         if paid is not None:
             if not paid:
                 if force_unpaid:
-                    cell_paid.value = int(paid)
+                    sheet.write(row, column + 1, value=int(paid))
                     pmt.paid = paid
             else:
                 pmt.paid = paid
-                cell_paid.value = int(paid)
+                sheet.write(row, column + 1, value=int(paid))
 
+        self._status = None
         if due_date is not None:
             pmt.due_date = due_date
-            cell_due_date.value = due_date
-            sheet.format_payment(cell_amount.column, pmt)
+            sheet.write(row, column + 2, value=due_date)
+            sheet.format_payment(column, pmt, int(self.status[pmt.index]))
+
+    @property
+    def changed(self) -> bool:
+        """True when any monitored sheet differs from the loaded workbook."""
+        return any(sheet.changed for sheet in self._payment_sheets.values())
+
+    @property
+    def changes(self) -> dict[str, list[str]]:
+        """Changed cell coordinates per sheet name."""
+        return {
+            name: sheet.changes
+            for name, sheet in self._payment_sheets.items()
+            if sheet.changed
+        }
+
+    @property
+    def status(self) -> np.ndarray:
+        """Status flags of every store row, classified once as of ``as_of``.
+
+        See ``payment_status`` for the flags; the result is reused until a
+        payment is updated.
+        """
+        if self._status is None or len(self._status) != len(self._store):
+            self._status = classify(self._store, self.as_of)
+        return self._status
 
     @property
     def payment_list(self) -> list[PaymentListItem]:
-        """Flatten all sheet categories into a single list of items."""
-        result: list[PaymentListItem] = []
-        for sheet in self._payment_sheets.values():
-            for category in sheet.categories.values():
-                for payment in category.payments.values():
-                    new_item: PaymentListItem = PaymentListItem(
-                        payment, category, sheet
+        """Flatten all sheet categories into a single list of items.
+
+        Items follow store order, so ``payment_list[i]`` is store row ``i``;
+        the list is built once and reused while no payment is added.
+        """
+        store = self._store
+        if self._payment_list is None or len(self._payment_list) != len(store):
+            self._payment_list = [
+                PaymentListItem(
+                    Payment.view(store, index),
+                    store.categories[category_code],
+                    store.sheets[sheet_code],
+                )
+                for index, (category_code, sheet_code) in enumerate(
+                    zip(
+                        store.category_code.tolist(),
+                        store.sheet_code.tolist(),
+                        strict=True,
                     )
-                    result.append(new_item)
-        return result
+                )
+            ]
+        return self._payment_list
+
+    @property
+    def store(self) -> PaymentStore:
+        """Column store holding every payment of the book."""
+        return self._store
 
     @property
     def sheets(self):
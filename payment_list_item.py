@@ -35,15 +35,20 @@ class PaymentListItem:
         """Return the source sheet."""
         return self._sheet
 
-    def to_dict(self):
-        """Serialize to a dict for JSON rendering in reports."""
+    def to_dict(self, b_days_left: int = None):
+        """Serialize to a dict for JSON rendering in reports.
+
+        ``b_days_left`` may be passed when it was already computed in batch.
+        """
+        if b_days_left is None:
+            b_days_left = self._payment.b_days_left
         return {
             'sheet': self._sheet.name,
             'category': self._category.name,
             'amount': round(self._payment.amount, 2),
             'paid': self._payment.paid,
             'duedate': self._payment.due_date.strftime("%Y-%m-%d"),
-            'b_days_left': self._payment.b_days_left,
+            'b_days_left': b_days_left,
             'icon': self._category.icon,
         }
 
@@ -1,21 +1,36 @@
 """Sheet-level helpers to read, write and format payment data."""
 
 import calendar
+from bisect import bisect_left
+from collections.abc import Callable
 from copy import copy
 from datetime import datetime, timedelta
 
+import numpy as np
+from loguru import logger
 from openpyxl.cell import Cell
+from openpyxl.cell.read_only import EMPTY_CELL
+from openpyxl.comments.comment_sheet import CommentSheet
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
 from openpyxl.styles import Color, PatternFill
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.constants import COMMENTS_NS
+from openpyxl.xml.functions import fromstring
 
 from payment import Payment
 from payment_category import PaymentCategory
+from payment_status import CURRENT_MONTH, OVERDUE, PAID
+from payment_store import PaymentStore
 
 RED_FILL = PatternFill(start_color='FFFF0000', end_color='FFFF0000', fill_type='solid')
 GREEN_FILL = PatternFill(fill_type='solid', start_color="92D050")
 YELLOW_FILL = PatternFill(fill_type='solid', start_color=Color(indexed=5))
 BLUE_FILL = PatternFill(fill_type='solid', start_color="6ED1FE")
 
+_UNSET = object()
+
 
 def add_months(source_date: datetime, months: int):
     """Return a new date shifted by a number of months."""
@@ -26,20 +41,75 @@ def add_months(source_date: datetime, months: int):
     return datetime(year, month, day)
 
 
+def read_only_comments(
+    worksheet: ReadOnlyWorksheet, writable: Callable[[], Worksheet] = None
+) -> dict[str, str]:
+    """Return cell comments of a read-only worksheet keyed by coordinate.
+
+    openpyxl skips comments in read-only mode, so the comments part is read
+    straight from the archive the worksheet was opened from. That relies on
+    openpyxl internals; if they are missing, comments are read from the
+    worksheet returned by ``writable`` instead.
+    """
+    try:
+        archive = worksheet.parent._archive  # pylint: disable=protected-access
+        rels_path = get_rels_path(worksheet._worksheet_path)  # pylint: disable=W0212
+        if rels_path not in archive.namelist():
+            return {}
+        result: dict[str, str] = {}
+        for rel in get_dependents(archive, rels_path).find(COMMENTS_NS):
+            comment_sheet = CommentSheet.from_tree(fromstring(archive.read(rel.target)))
+            for ref, comment in comment_sheet.comments:
+                result[ref] = comment.text
+        return result
+    except (AttributeError, KeyError) as err:
+        if writable is None:
+            raise
+        logger.warning(f"Reading comments from the writable workbook: {err!r}")
+    return {
+        cell.coordinate: cell.comment.text
+        for row in writable().iter_rows()
+        for cell in row
+        if cell.comment is not None
+    }
+
+
 class PaymentSheet:
-    """Abstraction over an openpyxl Worksheet for payments."""
+    """Abstraction over an openpyxl Worksheet for payments.
+
+    A sheet can be built from a read-only scan (see ``scan``) and bound to a
+    writable worksheet later, only when cells actually have to be written.
+    """
 
     _sheet: Worksheet = None
     _name: str = None
     _categories: dict[str, PaymentCategory] = None
     _monitored_cols: list[str] = None
+    _rows: dict[int, tuple] = None
+    _comments: dict[str, str] = None
+    _month_index: tuple[list[int], list[int]] = None
 
-    def __init__(self, worksheet: Worksheet, name: str, monitored_cols: list[str]):
-        """Bind to a worksheet and configure monitored columns."""
+    def __init__(
+        self,
+        worksheet: Worksheet,
+        name: str,
+        monitored_cols: list[str],
+        store: PaymentStore = None,
+    ):
+        """Bind to a worksheet and configure monitored columns.
+
+        Payments are kept in ``store``, shared by all sheets of a book; a
+        private store is created when none is given.
+        """
         self._categories = {}
         self._sheet = worksheet
         self._name = name
         self._monitored_cols = monitored_cols
+        self._store = store if store is not None else PaymentStore()
+        self._code = self._store.add_sheet(self)
+        self._pending: dict[tuple[int, int], dict] = {}
+        self._dirty: set[tuple[int, int]] = set()
+        self.active_row: int = -1
 
     @property
     def monitored_cols(self) -> list[str]:
@@ -66,104 +136,249 @@ class PaymentSheet:
         """Return the worksheet human-readable name."""
         return self._name
 
+    def scan(
+        self, worksheet: ReadOnlyWorksheet, writable: Callable[[], Worksheet] = None
+    ):
+        """Read cells of a read-only worksheet in a single streaming pass.
+
+        Only columns up to the last monitored triplet are kept; the sheet stays
+        unbound until ``bind`` is called with a writable worksheet, and writes
+        made meanwhile are kept as pending changes. ``writable`` provides the
+        same sheet loaded normally, used only if comments cannot be read.
+        """
+        width = max(column_index_from_string(c) for c in self._monitored_cols) + 2
+        self._rows = {}
+        for row_idx, cells in enumerate(worksheet.iter_rows(max_col=width), start=1):
+            self._rows[row_idx] = cells
+        self._comments = read_only_comments(worksheet, writable)
+
+    def bind(self, worksheet: Worksheet):
+        """Attach a writable worksheet, apply pending changes, drop the scan."""
+        self._sheet = worksheet
+        self._rows = None
+        self._comments = None
+        for (row, column), change in self._pending.items():
+            cell: Cell = worksheet.cell(row=row, column=column)
+            if "value" in change:
+                cell.value = change["value"]
+            if "style_from" in change:
+                source: Cell = worksheet.cell(*change["style_from"])
+                cell.number_format = source.number_format
+                cell.font = copy(source.font)
+                cell.border = copy(source.border)
+            if "fill" in change:
+                cell.fill = change["fill"]
+        self._pending = {}
+
+    @property
+    def changed(self) -> bool:
+        """True when any cell value or fill differs from the loaded file."""
+        return bool(self._dirty)
+
+    @property
+    def changes(self) -> list[str]:
+        """Coordinates of changed cells, in row order."""
+        return [
+            f"{get_column_letter(column)}{row}" for row, column in sorted(self._dirty)
+        ]
+
+    def _cell(self, row: int, column: int):
+        """Return the scanned read-only cell or the bound worksheet cell."""
+        if self._rows is None:
+            return self._sheet.cell(row=row, column=column)
+        cells = self._rows.get(row)
+        if cells is None or column > len(cells):
+            return EMPTY_CELL
+        return cells[column - 1]
+
+    def _value(self, row: int, column: int):
+        """Return a cell value, taking pending changes into account."""
+        change = self._pending.get((row, column))
+        if change is not None and "value" in change:
+            return change["value"]
+        return self._cell(row, column).value
+
+    def _fill(self, row: int, column: int):
+        """Return a cell fill, taking pending changes into account."""
+        change = self._pending.get((row, column))
+        if change is not None and "fill" in change:
+            return change["fill"]
+        return self._cell(row, column).fill
+
+    def write(
+        self,
+        row: int,
+        column: int,
+        value=_UNSET,
+        fill: PatternFill = None,
+        style_from: tuple[int, int] = None,
+    ):
+        """Set a cell value and/or fill, tracking whether anything changed.
+
+        ``style_from`` (row, column) copies number format, font and border from
+        another cell. Writes equal to the current content are dropped; while
+        the sheet is unbound, the rest is kept until ``bind``.
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        change = {}
+        if value is not _UNSET and self._value(row, column) != value:
+            change["value"] = value
+            if style_from is not None:
+                change["style_from"] = style_from
+        if fill is not None and self._fill(row, column) != fill:
+            change["fill"] = fill
+        if not change:
+            return
+        self._dirty.add((row, column))
+        if self._rows is not None:
+            self._pending.setdefault((row, column), {}).update(change)
+            return
+        cell: Cell = self._sheet.cell(row=row, column=column)
+        if "value" in change:
+            cell.value = value
+        if "style_from" in change:
+            source: Cell = self._sheet.cell(*style_from)
+            cell.number_format = source.number_format
+            cell.font = copy(source.font)
+            cell.border = copy(source.border)
+        if "fill" in change:
+            cell.fill = fill
+
+    def _comment(self, coordinate: str) -> str | None:
+        """Return the comment text of a cell, if any."""
+        if self._rows is None:
+            comment = self._sheet[coordinate].comment
+            return None if comment is None else comment.text
+        return self._comments.get(coordinate)
+
+    def _build_month_index(self) -> tuple[list[int], list[int]]:
+        """Index column A once as sorted (period, row) pairs.
+
+        A period is ``year * 12 + month - 1``; rows are read from row 2 down to
+        the first empty date cell, as the sheet keeps one row per month.
+        """
+        pairs: list[tuple[int, int]] = []
+        row = 2
+        date_item = self._value(row, 1)
+        while date_item is not None:
+            pairs.append((date_item.year * 12 + date_item.month - 1, row))
+            row += 1
+            date_item = self._value(row, 1)
+        # Column A is expected to be date-sorted; sort defensively so the
+        # earliest row wins for duplicated months, like a top-down scan would.
+        pairs.sort()
+        return [period for period, _ in pairs], [row for _, row in pairs]
+
+    def row_for_period(self, year: int, month: int) -> int:
+        """Return the row holding the given month, or -1 if absent."""
+        if self._month_index is None:
+            self._month_index = self._build_month_index()
+        periods, rows = self._month_index
+        period = year * 12 + month - 1
+        position = bisect_left(periods, period)
+        if position < len(periods) and periods[position] == period:
+            return rows[position]
+        return -1
+
     @property
     def get_active_row(self) -> int:
         """Locate the current month row or return -1 if not found."""
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        current_row = 2
-        found: bool = False
-        while self._sheet[f"A{current_row}"].value is not None:
-            date_item = self._sheet[f"A{current_row}"].value
-            if (date_item.month == current_month) and (date_item.year == current_year):
-                found = True
-                break
-            current_row += 1
-        if not found:
-            current_row = -1
-        return current_row
+        now = datetime.now()
+        return self.row_for_period(now.year, now.month)
 
     def populate_categories(self, active_row: int):
         """Populate internal categories and payments from the active row up."""
         # NOTE: consider validation/sanitization if inputs can be external
         for column in self._monitored_cols:
-            name = self._sheet[f"{column}1"].value
+            column_int = column_index_from_string(column)
+            name = self._value(1, column_int)
             item: PaymentCategory = PaymentCategory(name=name, column=column)
-            comment = self._sheet[f"{column}1"].comment
+            comment = self._comment(f"{column}1")
             if comment is None:
                 item.icon = "fa-camera"
             else:
-                item.icon = comment.text.strip()
+                item.icon = comment.strip()
+            category_code = self._store.add_category(item)
             processed_row = active_row
             while (
-                self._sheet[f"{column}{processed_row}"].value is not None
-                and processed_row > 1
+                self._value(processed_row, column_int) is not None and processed_row > 1
             ):
-                column_int, due_date, new_payment = self.populate_payment(
-                    processed_row, column
-                )
-                item.payments[f'{due_date.year}-{due_date.month}'] = new_payment
-
+                self.populate_payment(processed_row, column_int, item, category_code)
                 self._categories[item.name] = item
-                self.format_payment(column_int, new_payment)
                 processed_row -= 1
-        self._format_this_month_cells(active_row)
+        self.active_row = active_row
 
-    def populate_payment(self, active_row, column):
-        """Read a single row/column triplet into a Payment instance."""
-        amount = float(self._sheet[f"{column}{active_row}"].value)
-        column_int = self._sheet[f"{column}{active_row}"].col_idx
+    def populate_payment(
+        self,
+        active_row: int,
+        column_int: int,
+        category: PaymentCategory,
+        category_code: int,
+    ) -> Payment:
+        """Read a single row/column triplet into the store and the category.
+
+        A later row with the same due month replaces the values of the earlier
+        one, so the category keeps a single payment per month.
+        """
+        amount = float(self._value(active_row, column_int))
         try:
-            paid = bool(self._sheet.cell(column=column_int + 1, row=active_row).value)
+            paid = bool(self._value(active_row, column_int + 1))
         except ValueError:
             paid = False
-        due_date: datetime = self._sheet.cell(
-            column=column_int + 2, row=active_row
-        ).value
-        new_payment = Payment(
-            paid=paid, due_date=due_date, amount=amount, excel_row=active_row
-        )
-        return column_int, due_date, new_payment
-
-    # noinspection PyDunderSlots,PyUnresolvedReferences
+        due_date: datetime = self._value(active_row, column_int + 2)
+        key = f'{due_date.year}-{due_date.month}'
+        payment = category.payments.get(key)
+        if payment is None:
+            index = self._store.append(
+                amount=amount,
+                paid=paid,
+                due_date=due_date,
+                excel_row=active_row,
+                sheet_code=self._code,
+                category_code=category_code,
+            )
+            payment = Payment.view(self._store, index)
+            category.payments[key] = payment
+        else:
+            payment.amount = amount
+            payment.paid = paid
+            payment.due_date = due_date
+            payment.excel_row = active_row
+        return payment
+
+    def format_categories(self, status: np.ndarray):
+        """Apply status fills to all payments and the active month cells.
+
+        ``status`` holds the flags from ``payment_status.classify`` for every
+        row of the store backing this sheet.
+        """
+        for category in self._categories.values():
+            column_int = column_index_from_string(category.column)
+            for payment in category.payments.values():
+                self.format_payment(column_int, payment, int(status[payment.index]))
+        self._format_this_month_cells(self.active_row)
+
     def _format_this_month_cells(self, active_row: int):
         """Highlight current and previous month summary cells."""
-        cell_this_month_sum: Cell = self.sheet.cell(column=2, row=active_row)
-        cell_this_month: Cell = self.sheet.cell(column=1, row=active_row)
-        cell_this_month.fill = YELLOW_FILL
-        cell_this_month_sum.fill = YELLOW_FILL
+        self.write(active_row, 1, fill=YELLOW_FILL)
+        self.write(active_row, 2, fill=YELLOW_FILL)
         # NOTE: consider adding checks for edge cases
-        cell_previous_month_sum: Cell = self.sheet.cell(column=2, row=active_row - 1)
-        cell_previous_month: Cell = self.sheet.cell(column=1, row=active_row - 1)
-        cell_previous_month.fill = GREEN_FILL
-        cell_previous_month_sum.fill = GREEN_FILL
-
-    # noinspection PyDunderSlots,PyUnresolvedReferences
-    def format_payment(self, column: int, payment: Payment):
-        """Apply fills to amount/paid/due cells depending on status."""
+        self.write(active_row - 1, 1, fill=GREEN_FILL)
+        self.write(active_row - 1, 2, fill=GREEN_FILL)
+
+    def format_payment(self, column: int, payment: Payment, status: int):
+        """Apply fills to amount/paid/due cells depending on status flags."""
         # NOTE: add input validation if needed
-        cell_amount: Cell = self.sheet.cell(row=payment.excel_row, column=column)
-        cell_paid: Cell = self.sheet.cell(row=payment.excel_row, column=column + 1)
-        cell_due_date: Cell = self.sheet.cell(row=payment.excel_row, column=column + 2)
-        if payment.overdue:
-            cell_amount.fill = RED_FILL
-            cell_paid.fill = RED_FILL
-            cell_due_date.fill = RED_FILL
-        elif payment.paid:
-            cell_amount.fill = GREEN_FILL
-            cell_paid.fill = GREEN_FILL
-            cell_due_date.fill = GREEN_FILL
-        elif (
-            payment.due_date.year == datetime.now().year
-            and payment.due_date.month == datetime.now().month
-        ):
-            cell_amount.fill = YELLOW_FILL
-            cell_paid.fill = YELLOW_FILL
-            cell_due_date.fill = YELLOW_FILL
+        if status & OVERDUE:
+            fill = RED_FILL
+        elif status & PAID:
+            fill = GREEN_FILL
+        elif status & CURRENT_MONTH:
+            fill = YELLOW_FILL
         else:
-            cell_amount.fill = BLUE_FILL
-            cell_paid.fill = BLUE_FILL
-            cell_due_date.fill = BLUE_FILL
+            fill = BLUE_FILL
+        for offset in range(3):
+            self.write(payment.excel_row, column + offset, fill=fill)
 
     def populate_next_month(self, current_row: int):
         """Ensure next month row is present and pre-filled based on current."""
@@ -172,45 +387,26 @@ class PaymentSheet:
             self._process_next_sum(current_row)
             self._populate_next_month_payments(current_row)
 
-    # noinspection PyDunderSlots,PyUnresolvedReferences
     def _populate_next_month_payments(self, current_row: int):
         """Copy amount/paid/due values forward into next month row."""
+        next_row = current_row + 1
         for category in self.categories.values():
-            current_amount_cell: Cell = self.sheet[f'{category.column}{current_row}']
-            current_paid_cell = self.sheet.cell(
-                row=current_row, column=current_amount_cell.col_idx + 1
-            )
-            current_due_date_cell = self.sheet.cell(
-                row=current_row, column=current_amount_cell.col_idx + 2
-            )
-
-            next_amount_cell: Cell = self.sheet[f'{category.column}{current_row + 1}']
-            next_paid_cell = self.sheet.cell(
-                row=current_row + 1, column=current_amount_cell.col_idx + 1
-            )
-            next_due_date_cell = self.sheet.cell(
-                row=current_row + 1, column=current_amount_cell.col_idx + 2
-            )
-            if next_amount_cell.value is None:
-                next_amount_cell.value = current_amount_cell.value
-                next_amount_cell.number_format = current_amount_cell.number_format
-                next_amount_cell.font = copy(current_amount_cell.font)
-                next_amount_cell.border = copy(current_amount_cell.border)
-            next_amount_cell.fill = BLUE_FILL
-
-            if next_paid_cell.value is None:
-                next_paid_cell.value = 0
-                next_paid_cell.number_format = current_paid_cell.number_format
-                next_paid_cell.font = copy(current_paid_cell.font)
-                next_paid_cell.border = copy(current_paid_cell.border)
-            next_paid_cell.fill = BLUE_FILL
-
-            if next_due_date_cell.value is None:
-                next_due_date_cell.value = add_months(current_due_date_cell.value, 1)
-                next_due_date_cell.number_format = current_due_date_cell.number_format
-                next_due_date_cell.font = copy(current_due_date_cell.font)
-                next_due_date_cell.border = copy(current_due_date_cell.border)
-            next_due_date_cell.fill = BLUE_FILL
+            column = column_index_from_string(category.column)
+            for offset in range(3):
+                if self._value(next_row, column + offset) is None:
+                    if offset == 0:
+                        value = self._value(current_row, column)
+                    elif offset == 1:
+                        value = 0
+                    else:
+                        value = add_months(self._value(current_row, column + 2), 1)
+                    self.write(
+                        next_row,
+                        column + offset,
+                        value=value,
+                        style_from=(current_row, column + offset),
+                    )
+                self.write(next_row, column + offset, fill=BLUE_FILL)
 
     def _generate_sum_string(self, row: int):
         """Build an Excel SUM formula over monitored columns for the row."""
@@ -224,38 +420,35 @@ class PaymentSheet:
         result += ")"
         return result
 
-    # noinspection PyDunderSlots,PyUnresolvedReferences
     def _process_next_sum(self, current_row):
         """Create next month's summary formula if absent."""
-        cell_this_month_sum: Cell = self.sheet.cell(column=2, row=current_row)
-        cell_next_month_sum: Cell = self.sheet.cell(column=2, row=current_row + 1)
-        if cell_next_month_sum.value is None:
-            cell_next_month_sum.value = self._generate_sum_string(current_row + 1)
-            cell_next_month_sum.number_format = cell_this_month_sum.number_format
-            cell_next_month_sum.font = copy(cell_this_month_sum.font)
-            cell_next_month_sum.border = copy(cell_this_month_sum.border)
-            cell_next_month_sum.fill = BLUE_FILL
-
-    # noinspection PyDunderSlots,PyUnresolvedReferences
+        if self._value(current_row + 1, 2) is None:
+            self.write(
+                current_row + 1,
+                2,
+                value=self._generate_sum_string(current_row + 1),
+                fill=BLUE_FILL,
+                style_from=(current_row, 2),
+            )
+
     def _process_next_month_cell(self, current_row):
         """Create the next month date cell if missing; return whether to proceed."""
-        cell_next_month: Cell = self.sheet.cell(column=1, row=current_row + 1)
-        cell_this_month: Cell = self.sheet.cell(column=1, row=current_row)
+        next_month_value = self._value(current_row + 1, 1)
         now = datetime.now()
         now = datetime(year=now.year, month=now.month, day=now.day)
         next_month_date = (now.replace(day=1) + timedelta(days=32)).replace(day=1)
-        if cell_next_month.value is None:
-            cell_next_month.value = next_month_date
-            cell_next_month.number_format = self.sheet.cell(
-                column=1, row=current_row
-            ).number_format
-            cell_next_month.number_format = cell_this_month.number_format
-            cell_next_month.font = copy(cell_this_month.font)
-            cell_next_month.border = copy(cell_this_month.border)
-            cell_next_month.fill = BLUE_FILL
+        if next_month_value is None:
+            self.write(
+                current_row + 1,
+                1,
+                value=next_month_date,
+                fill=BLUE_FILL,
+                style_from=(current_row, 1),
+            )
+            self._month_index = None
             process = True
-        elif cell_next_month.value == next_month_date:
-            cell_next_month.fill = BLUE_FILL
+        elif next_month_value == next_month_date:
+            self.write(current_row + 1, 1, fill=BLUE_FILL)
             process = True
         else:
             process = False
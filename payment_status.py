@@ -0,0 +1,34 @@
+"""Vectorized status classification of payments held in a store."""
+
+from datetime import datetime
+
+import numpy as np
+
+from payment_store import PaymentStore
+
+# Status flags, combined bitwise in the classification result
+PAID = 1
+OVERDUE = 2
+DUE_SOON = 4  # unpaid and due within two days, overdue included
+CURRENT_MONTH = 8
+
+DUE_SOON_WINDOW = np.timedelta64(2, 'D')
+
+
+def classify(store: PaymentStore, as_of: datetime) -> np.ndarray:
+    """Return status flags of every store row as of a single timestamp.
+
+    Semantics match ``Payment.paid``, ``Payment.overdue``,
+    ``Payment.due_soon_or_overdue`` and the current-month check used when
+    formatting cells, evaluated once for the whole store.
+    """
+    now = np.datetime64(as_of, 'us')
+    due = store.due_date
+    paid = store.paid
+    unpaid = ~paid
+    status = paid * np.uint8(PAID)
+    status |= (unpaid & (due < now)) * np.uint8(OVERDUE)
+    status |= (unpaid & (due <= now + DUE_SOON_WINDOW)) * np.uint8(DUE_SOON)
+    this_month = np.datetime64(as_of, 'M')
+    status |= (due.astype('datetime64[M]') == this_month) * np.uint8(CURRENT_MONTH)
+    return status
@@ -0,0 +1,111 @@
+"""Column-oriented storage backing payments of a book."""
+
+from datetime import datetime
+
+import numpy as np
+
+NO_CODE = -1
+
+
+class PaymentStore:
+    """Growable NumPy columns holding every payment of a book.
+
+    Each payment is a row identified by its index; ``Payment`` objects are thin
+    views on a row. Sheets and categories are stored once and referenced by
+    integer codes so the whole history can be processed with array operations.
+    """
+
+    def __init__(self, capacity: int = 64):
+        """Allocate empty columns for ``capacity`` payments."""
+        self._size = 0
+        self._amount = np.zeros(capacity, dtype=np.float64)
+        self._paid = np.zeros(capacity, dtype=bool)
+        self._due_date = np.full(capacity, np.datetime64('NaT'), 'datetime64[us]')
+        self._excel_row = np.zeros(capacity, dtype=np.int32)
+        self._sheet_code = np.full(capacity, NO_CODE, dtype=np.int16)
+        self._category_code = np.full(capacity, NO_CODE, dtype=np.int32)
+        self.sheets: list = []
+        self.categories: list = []
+
+    def __len__(self) -> int:
+        """Return the number of stored payments."""
+        return self._size
+
+    def _grow(self):
+        """Double the capacity of every column."""
+        capacity = max(2 * len(self._amount), 1)
+        for name in (
+            '_amount',
+            '_paid',
+            '_due_date',
+            '_excel_row',
+            '_sheet_code',
+            '_category_code',
+        ):
+            column = getattr(self, name)
+            grown = np.empty(capacity, dtype=column.dtype)
+            grown[: self._size] = column[: self._size]
+            setattr(self, name, grown)
+
+    def append(
+        self,
+        amount: float,
+        paid: bool,
+        due_date: datetime,
+        excel_row: int,
+        sheet_code: int = NO_CODE,
+        category_code: int = NO_CODE,
+    ) -> int:
+        """Add a payment row and return its index."""
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if self._size == len(self._amount):
+            self._grow()
+        index = self._size
+        self._amount[index] = amount
+        self._paid[index] = paid
+        self._due_date[index] = due_date
+        self._excel_row[index] = excel_row
+        self._sheet_code[index] = sheet_code
+        self._category_code[index] = category_code
+        self._size += 1
+        return index
+
+    def add_sheet(self, sheet) -> int:
+        """Register a sheet and return its code."""
+        self.sheets.append(sheet)
+        return len(self.sheets) - 1
+
+    def add_category(self, category) -> int:
+        """Register a category and return its code."""
+        self.categories.append(category)
+        return len(self.categories) - 1
+
+    @property
+    def amount(self) -> np.ndarray:
+        """Amounts of all payments."""
+        return self._amount[: self._size]
+
+    @property
+    def paid(self) -> np.ndarray:
+        """Paid flags of all payments."""
+        return self._paid[: self._size]
+
+    @property
+    def due_date(self) -> np.ndarray:
+        """Due dates of all payments as ``datetime64[us]``."""
+        return self._due_date[: self._size]
+
+    @property
+    def excel_row(self) -> np.ndarray:
+        """Workbook rows of all payments."""
+        return self._excel_row[: self._size]
+
+    @property
+    def sheet_code(self) -> np.ndarray:
+        """Codes of the sheets payments belong to (index into ``sheets``)."""
+        return self._sheet_code[: self._size]
+
+    @property
+    def category_code(self) -> np.ndarray:
+        """Codes of payment categories (index into ``categories``)."""
+        return self._category_code[: self._size]
@@ -1,18 +1,23 @@
 """Pushover client for push notifications."""
 
-import http.client
-import urllib
+from loguru import logger
 
 from api_clients.client import Client
+from api_clients.transport import Transport, default_transport
+
+MESSAGES_URL = "https://api.pushover.net/1/messages.json"
 
 
 class Pushover(Client):
     """Simple Pushover API wrapper to send messages and errors."""
 
-    def __init__(self, apikey: str, user: str):
+    def __init__(self, apikey: str, user: str, transport: Transport = None):
         """Store API credentials for later requests."""
         self.apikey = apikey
         self.user = user
+        # log messages instead of sending them
+        self.run_dry = False
+        self._session = (transport or default_transport()).session()
 
     def login(self):
         """Pushover does not require an explicit login."""
@@ -20,20 +25,17 @@ class Pushover(Client):
 
     def notify(self, message: str):
         """Send a notification message via Pushover."""
-        conn = http.client.HTTPSConnection("api.pushover.net:443")
-        conn.request(
-            "POST",
-            "/1/messages.json",
-            urllib.parse.urlencode(
-                {
-                    "token": self.apikey,
-                    "user": self.user,
-                    "message": message,
-                }
-            ),
-            {"Content-type": "application/x-www-form-urlencoded"},
+        if self.run_dry:
+            logger.info(f"Pushover message not sent (dry run): {message}")
+            return
+        self._session.post(
+            MESSAGES_URL,
+            data={
+                "token": self.apikey,
+                "user": self.user,
+                "message": message,
+            },
         )
-        conn.getresponse()
 
     def error(self, message):
         """Send an error-prefixed notification."""
@@ -0,0 +1,148 @@
+"""Per-handler timing, memory and transfer metrics of a pipeline run."""
+
+import json
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+from loguru import logger
+
+_current: ContextVar["HandlerMetrics | None"] = ContextVar(
+    "current_handler_metrics", default=None
+)
+_bytes_lock = threading.Lock()
+
+
+@dataclass
+class HandlerMetrics:
+    """Measurements of a single handler execution."""
+
+    name: str
+    started: str = ""
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_rss_growth_bytes: int = 0
+    bytes_received: int = 0
+    bytes_sent: int = 0
+    status: str = "ok"
+    error: str | None = None
+
+
+def _peak_rss() -> int:
+    """Peak resident set size of the process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux and the BSDs kilobytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def count_bytes(received: int = 0, sent: int = 0):
+    """Attribute transferred bytes to the handler running in this thread.
+
+    Called by API clients; does nothing outside a measured handler.
+    """
+    record = _current.get()
+    if record is not None:
+        with _bytes_lock:
+            record.bytes_received += received
+            record.bytes_sent += sent
+
+
+def in_current_context(function):
+    """Wrap ``function`` to run in a copy of the caller's context.
+
+    Use it for work submitted to worker threads, so bytes they transfer are
+    attributed to the handler that started them.
+    """
+    return partial(copy_context().run, function)
+
+
+@dataclass
+class RunMetrics:
+    """Collects ``HandlerMetrics`` of one run; safe to use from many threads.
+
+    Memory is reported as the growth of the process peak RSS while the
+    handler ran. It costs nothing to collect, but it is process wide, so it
+    also includes handlers running at the same time.
+    """
+
+    started: datetime = field(default_factory=datetime.now)
+    handlers: list[HandlerMetrics] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str):
+        """Measure the enclosed block as a handler named ``name``.
+
+        The record is yielded so the caller can adjust its ``status``;
+        exceptions are recorded as ``error`` and re-raised.
+        """
+        record = HandlerMetrics(name=name, started=datetime.now().isoformat())
+        token = _current.set(record)
+        memory_start = _peak_rss()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield record
+        except BaseException as exc:
+            record.status = "error"
+            record.error = repr(exc)
+            raise
+        finally:
+            record.cpu_s = time.thread_time() - cpu_start
+            record.wall_s = time.perf_counter() - wall_start
+            record.peak_rss_growth_bytes = _peak_rss() - memory_start
+            _current.reset(token)
+            with self._lock:
+                self.handlers.append(record)
+
+    @property
+    def total_wall_s(self) -> float:
+        """Seconds elapsed since the run started."""
+        return (datetime.now() - self.started).total_seconds()
+
+    def summary(self) -> str:
+        """One-line summary of the run, handlers in completion order."""
+        with self._lock:
+            handlers = list(self.handlers)
+        parts = []
+        for record in handlers:
+            part = f"{record.name} {record.wall_s:.2f}s"
+            if record.bytes_received or record.bytes_sent:
+                part += (
+                    f" ({record.bytes_received / 1024:.0f}/"
+                    f"{record.bytes_sent / 1024:.0f} kB)"
+                )
+            if record.status != "ok":
+                part += f" {record.status}"
+            parts.append(part)
+        return f"Run {self.total_wall_s:.2f}s: " + ", ".join(parts)
+
+    def to_dict(self) -> dict:
+        """JSON-friendly representation of the run."""
+        with self._lock:
+            handlers = [asdict(record) for record in self.handlers]
+        return {
+            "started": self.started.isoformat(),
+            "wall_s": self.total_wall_s,
+            "handlers": handlers,
+        }
+
+    def save(self, directory: Path) -> Path | None:
+        """Write the run record to ``directory`` as JSON; return its path."""
+        path = Path(directory) / f"run-{self.started:%Y%m%d-%H%M%S}.json"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+        except OSError:
+            logger.exception("Problem with saving run metrics")
+            return None
+        return path
@@ -0,0 +1,31 @@
+from datetime import date
+
+import numpy as np
+
+from business_days import busday_count, easter_sunday, polish_holidays
+
+
+def test_easter_sunday():
+    assert easter_sunday(2024) == date(2024, 3, 31)
+    assert easter_sunday(2025) == date(2025, 4, 20)
+    assert easter_sunday(2026) == date(2026, 4, 5)
+
+
+def test_polish_holidays():
+    holidays = polish_holidays(2025)
+    assert date(2025, 4, 21) in holidays  # Easter Monday
+    assert date(2025, 6, 19) in holidays  # Corpus Christi
+    assert date(2025, 12, 24) in holidays
+    assert date(2024, 12, 24) not in polish_holidays(2024)
+
+
+def test_busday_count_skips_holidays():
+    # Mon 2025-11-10 .. Mon 2025-11-17: Nov 11 is a holiday
+    assert busday_count(date(2025, 11, 10), date(2025, 11, 17)) == 4
+    assert busday_count(date(2025, 11, 17), date(2025, 11, 10)) == -4
+
+
+def test_busday_count_batch():
+    due = np.array(["2025-12-22", "2025-12-29", "2026-01-07"], dtype="datetime64[D]")
+    counts = busday_count(date(2025, 12, 22), due)
+    assert counts.tolist() == [0, 2, 7]
@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from api_clients.dropbox_client import DropboxClient, content_hash
+
+
+class _FakeDropbox:
+    def __init__(self, data: bytes, rev: str):
+        self.data = data
+        self.rev = rev
+        self.downloads = 0
+
+    def _metadata(self):
+        return SimpleNamespace(rev=self.rev, content_hash=content_hash(self.data))
+
+    def files_get_metadata(self, path):
+        return self._metadata()
+
+    def files_download(self, path):
+        self.downloads += 1
+        return self._metadata(), SimpleNamespace(content=self.data)
+
+
+def _client(tmp_path, fake):
+    client = DropboxClient("key", cache_dir=tmp_path)
+    client._dbx = fake
+    return client
+
+
+def test_retrieve_file_reuses_cache_for_same_revision(tmp_path):
+    fake = _FakeDropbox(b"workbook-v1", rev="1")
+    client = _client(tmp_path, fake)
+
+    assert client.retrieve_file("/Oplaty.xlsm") == b"workbook-v1"
+    assert client.retrieve_file("/Oplaty.xlsm") == b"workbook-v1"
+    assert fake.downloads == 1
+
+
+def test_retrieve_file_downloads_new_revision(tmp_path):
+    fake = _FakeDropbox(b"workbook-v1", rev="1")
+    client = _client(tmp_path, fake)
+    client.retrieve_file("/Oplaty.xlsm")
+
+    fake.data, fake.rev = b"workbook-v2", "2"
+    assert client.retrieve_file("/Oplaty.xlsm") == b"workbook-v2"
+    assert fake.downloads == 2
@@ -0,0 +1,149 @@
+import base64
+import json
+import threading
+import time
+from datetime import date
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api_clients import ekartoteka
+from api_clients.ekartoteka import Ekartoteka
+from api_clients.replay import RecordingBackend, ReplayBackend
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport
+
+CREDENTIALS = {"username": "jan", "password": "secret"}
+
+
+def _jwt(exp: float) -> str:
+    payload = json.dumps({"username": "123_jan", "exp": int(exp)}).encode()
+    return "h." + base64.urlsafe_b64encode(payload).decode().rstrip("=") + ".s"
+
+
+def _response(url: str, status: int, body=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.reason = "Unauthorized" if status == 401 else "OK"
+    response._content = json.dumps(body).encode()
+    return response
+
+
+class _FakeApi(BaseAdapter):
+    """Transport backend serving the e-kartoteka API."""
+
+    def __init__(self, exp: float):
+        super().__init__()
+        self.exp = exp
+        self.calls: list[str] = []
+        self.valid_tokens: set[str] = set()
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        response = self._serve(request.url, request.headers)
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+    def _serve(self, url, headers):
+        with self.lock:
+            self.calls.append(url)
+            if url == Ekartoteka.URL_TOKEN:
+                token = _jwt(self.exp) + str(len(self.calls))
+                self.valid_tokens.add(token)
+                return _response(url, 200, {"token": token})
+        token = headers.get("Authorization", "").removeprefix("Bearer ")
+        if token not in self.valid_tokens:
+            return _response(url, 401)
+        if url == Ekartoteka.URL_ME:
+            body = {"Nazwa": "Jan", "Email": "jan@example.com", "DaneKsiegowe": [9]}
+        elif "rozrachunki" in url:
+            body = {"results": [{"Wn": 500.0, "Ma": 200.0}]}
+        elif "datyaktualizacji" in url:
+            body = {"results": [{"typ": "LI", "data": f"{date.today():%Y-%m-%d}"}]}
+        else:
+            body = [{"Brutto": 512.5}]
+        return _response(url, 200, body)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    fake = _FakeApi(exp=time.time() + 3600)
+    transport = Transport(backend=fake)
+    monkeypatch.setattr(ekartoteka, "default_transport", lambda: transport)
+    return fake
+
+
+def test_token_is_reused_from_cache(api, tmp_path):
+    store = SessionStore(tmp_path)
+    first = Ekartoteka(CREDENTIALS, session_store=store)
+    first.login()
+    assert first.get_current_fees_sum() == 512.5
+
+    api.calls.clear()
+    second = Ekartoteka(CREDENTIALS, session_store=store)
+    second.login()
+
+    assert (second.client_id, second.user_id) == (123, 9)
+    assert second.get_current_fees_sum() == 512.5
+    assert Ekartoteka.URL_TOKEN not in api.calls
+    assert Ekartoteka.URL_ME not in api.calls
+
+
+def test_rejected_cached_token_triggers_login(api, tmp_path):
+    store = SessionStore(tmp_path)
+    Ekartoteka(CREDENTIALS, session_store=store).login()
+    api.valid_tokens.clear()  # e.g. revoked on the server
+
+    client = Ekartoteka(CREDENTIALS, session_store=store)
+    client.login()
+    assert client.get_current_fees_sum() == 512.5
+    assert api.calls.count(Ekartoteka.URL_TOKEN) == 2
+
+
+def test_token_close_to_expiry_is_not_reused(api, tmp_path):
+    api.exp = time.time() + 60
+    store = SessionStore(tmp_path)
+    Ekartoteka(CREDENTIALS, session_store=store).login()
+    Ekartoteka(CREDENTIALS, session_store=store).login()
+    assert api.calls.count(Ekartoteka.URL_TOKEN) == 2
+
+
+def test_payment_status_joins_parallel_requests(api, tmp_path):
+    client = Ekartoteka(CREDENTIALS, session_store=SessionStore(tmp_path))
+    client.login()
+    api.calls.clear()
+
+    result = client.get_payment_status()
+
+    assert len(api.calls) == 3
+    assert result.apartment_fee == 512.5
+    assert result.delta == 300.0
+    assert result.paid is False
+    assert result.update_dates["LI"].month == date.today().month
+
+
+def test_cold_start_recording_replays_offline(api, tmp_path):
+    secrets = [CREDENTIALS["password"]]
+    transport = ekartoteka.default_transport()
+    transport.backend = RecordingBackend(tmp_path / "fixtures", secrets, api)
+    client = Ekartoteka(CREDENTIALS, session_store=SessionStore(tmp_path / "rec"))
+    client.login()
+    recorded = client.get_payment_status()
+
+    api.calls.clear()
+    transport.backend = ReplayBackend(tmp_path / "fixtures", secrets)
+    client = Ekartoteka(CREDENTIALS, session_store=SessionStore(tmp_path / "replay"))
+    client.login()
+    replayed = client.get_payment_status()
+
+    assert api.calls == []
+    assert (replayed.apartment_fee, replayed.delta, replayed.paid) == (
+        recorded.apartment_fee,
+        recorded.delta,
+        recorded.paid,
+    )
@@ -0,0 +1,163 @@
+import threading
+from datetime import datetime
+from http.cookiejar import CookieJar
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api_clients.enea import (
+    INVOICE_ROW_CLASS,
+    READOUT_ROW_CLASS,
+    Enea,
+    ScraperStructureError,
+    _extract_last_invoice,
+    _extract_last_readout,
+    _first_row_markup,
+    parse_first_row,
+)
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport
+
+
+def _invoice_row(issued: str, value: str, quote: str = '"') -> str:
+    cols = {
+        "invoice-prognosis-date": issued,
+        "invoice-prognosis-payment-date": "20.03.2025",
+        "invoice-prognosis-value": value,
+        "invoice-prognosis-payment": "0,00 zł",
+        "invoice-prognosis-status": "<span>Zapłacona</span>",
+    }
+    inner = "".join(
+        f'<div class="datagrid-col-{name}">\n{text}\n</div>'
+        for name, text in cols.items()
+    )
+    return f"<div class={quote}{INVOICE_ROW_CLASS}{quote}>{inner}</div>"
+
+
+INVOICES = (
+    "<html><body><div class='menu'>"
+    + "<a>link</a>" * 50
+    + "</div>"
+    + _invoice_row("01.03.2025", "123,45 zł")
+    + _invoice_row("01.02.2025", "99,00 zł")
+    + "</body></html>"
+)
+READOUTS = (
+    "<html><body>"
+    + "".join(
+        f'<div class="{READOUT_ROW_CLASS}">'
+        f'<div class="datagrid-col-history-consumption-date">{day}.03.2025</div>'
+        f'<div class="datagrid-col-history-consumption-value-0">1234,5 kWh</div>'
+        "</div>"
+        for day in ("28", "27")
+    )
+    + "</body></html>"
+)
+
+
+def test_first_row_is_parsed_without_the_rest_of_the_page():
+    assert "01.02.2025" not in _first_row_markup(INVOICES, INVOICE_ROW_CLASS)
+    assert "menu" not in _first_row_markup(INVOICES, INVOICE_ROW_CLASS)
+
+    issued, due, value, unpaid, status = parse_first_row(
+        INVOICES, INVOICE_ROW_CLASS, _extract_last_invoice
+    )
+    assert (issued, due) == (datetime(2025, 3, 1), datetime(2025, 3, 20))
+    assert (value, unpaid, status) == (123.45, 0.0, "Zapłacona")
+
+    assert parse_first_row(READOUTS, READOUT_ROW_CLASS, _extract_last_readout) == (
+        1234.5,
+        datetime(2025, 3, 28),
+    )
+
+
+def test_unexpected_markup_falls_back_to_full_parse():
+    single_quoted = "<html>" + _invoice_row("05.03.2025", "1,00 zł", "'") + "</html>"
+    issued, *_ = parse_first_row(
+        single_quoted, INVOICE_ROW_CLASS, _extract_last_invoice
+    )
+    assert issued == datetime(2025, 3, 5)
+
+
+def test_structure_errors_are_kept():
+    with pytest.raises(ScraperStructureError, match="invoice row"):
+        parse_first_row("<html></html>", INVOICE_ROW_CLASS, _extract_last_invoice)
+    broken = INVOICES.replace("datagrid-col-invoice-prognosis-value", "other")
+    with pytest.raises(ScraperStructureError, match="invoice total value"):
+        parse_first_row(broken, INVOICE_ROW_CLASS, _extract_last_invoice)
+
+
+class _ConcurrentBackend(BaseAdapter):
+    """Serves both pages only if they are requested at the same time."""
+
+    def __init__(self):
+        super().__init__()
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def send(self, request, **kwargs):
+        self.barrier.wait()
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        body = INVOICES if request.url.endswith(Enea.URL_INVOICES) else READOUTS
+        response._content = body.encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def test_get_data_fetches_pages_concurrently():
+    transport = Transport(backend=_ConcurrentBackend())
+    enea = Enea("user@example.com", "secret", transport=transport)
+    enea.session = transport.session()
+
+    result = enea.get_data()
+
+    assert result.last_invoice_amount_pln == 123.45
+    assert result.last_readout_date == datetime(2025, 3, 28)
+
+
+class _FailingProbeBackend(BaseAdapter):
+    """Answers the stored session probe with a server error."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[str] = []
+
+    def send(self, request, **kwargs):
+        path = request.url.removeprefix(Enea.URL_BASE)
+        self.calls.append(f"{request.method} {path}")
+        response = requests.Response()
+        response.status_code = 500 if path == Enea.URL_INVOICES else 200
+        response.url = request.url
+        response.request = request
+        body = '<input name="token" value="t"/>' if path == Enea.URL_LOGIN else ""
+        response._content = body.encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def test_failing_stored_session_falls_back_to_login(tmp_path):
+    store = SessionStore(tmp_path)
+    store.save(Enea.SESSION_PORTAL, "user@example.com", "secret", CookieJar())
+    backend = _FailingProbeBackend()
+    enea = Enea(
+        "user@example.com",
+        "secret",
+        session_store=store,
+        transport=Transport(backend=backend),
+    )
+
+    enea.login()
+
+    assert enea.logged_in
+    assert backend.calls == [
+        f"GET {Enea.URL_INVOICES}",
+        f"GET {Enea.URL_LOGIN}",
+        f"POST {Enea.URL_LOGIN}",
+    ]
@@ -0,0 +1,119 @@
+import smtplib
+
+import gmail_adapter
+from gmail_adapter import GmailAdapter
+
+
+class _FakeSmtp:
+    """SMTP_SSL stand-in refusing some recipients and dropping once."""
+
+    instances: list["_FakeSmtp"] = []
+    refuse_once: set[str] = set()
+    disconnect_once = False
+
+    def __init__(self, host, port):
+        self.transactions: list[tuple[list[str], str]] = []
+        self.logins = 0
+        self.closed = False
+        self.instances.append(self)
+
+    def ehlo(self):
+        pass
+
+    def login(self, username, password):
+        self.logins += 1
+
+    def sendmail(self, sender, recipients, message):
+        recipients = [recipients] if isinstance(recipients, str) else recipients
+        if _FakeSmtp.disconnect_once:
+            _FakeSmtp.disconnect_once = False
+            self.closed = True
+        if self.closed:
+            raise smtplib.SMTPServerDisconnected("connection closed")
+        refused = {r: (450, b"busy") for r in recipients if r in self.refuse_once}
+        self.refuse_once -= set(refused)
+        if len(refused) == len(recipients):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        self.transactions.append((recipients, message))
+        return refused
+
+    def close(self):
+        pass
+
+
+def _adapter(monkeypatch, refuse_once=(), disconnect_once=False) -> GmailAdapter:
+    monkeypatch.setattr(gmail_adapter.smtplib, "SMTP_SSL", _FakeSmtp)
+    _FakeSmtp.instances = []
+    _FakeSmtp.refuse_once = set(refuse_once)
+    _FakeSmtp.disconnect_once = disconnect_once
+    adapter = GmailAdapter("smtp.example.com", 465, "me@example.com", "secret")
+    adapter.retry_delay = 0
+    adapter.login()
+    return adapter
+
+
+def test_one_transaction_for_all_recipients(monkeypatch):
+    adapter = _adapter(monkeypatch)
+
+    failed = adapter.send_mail_many(["a@x.pl", "b@x.pl"], "Report", "<p>hi</p>")
+
+    assert failed == []
+    [(recipients, message)] = _FakeSmtp.instances[0].transactions
+    assert recipients == ["a@x.pl", "b@x.pl"]
+    assert "To: undisclosed-recipients:;" in message
+    assert "a@x.pl" not in message
+
+
+def test_refused_recipient_is_retried_alone(monkeypatch):
+    adapter = _adapter(monkeypatch, refuse_once={"b@x.pl"})
+
+    failed = adapter.send_mail_many(["a@x.pl", "b@x.pl"], "Report", "<p>hi</p>")
+
+    assert failed == []
+    transactions = _FakeSmtp.instances[0].transactions
+    assert [recipients for recipients, _ in transactions] == [
+        ["a@x.pl", "b@x.pl"],
+        ["b@x.pl"],
+    ]
+    # the retry sends the very same message
+    assert transactions[0][1] == transactions[1][1]
+
+
+def test_broken_connection_is_reopened_and_failures_reported(monkeypatch):
+    adapter = _adapter(monkeypatch, disconnect_once=True)
+
+    def refuse_c_always(self, sender, recipients, message):
+        if recipients == ["c@x.pl"]:
+            raise smtplib.SMTPRecipientsRefused({"c@x.pl": (550, b"no such user")})
+        return original(self, sender, recipients, message)
+
+    original = _FakeSmtp.sendmail
+    monkeypatch.setattr(_FakeSmtp, "sendmail", refuse_c_always)
+
+    failed = adapter.send_mail_many(["a@x.pl", "c@x.pl"], "Report", "<p>hi</p>")
+
+    assert failed == ["c@x.pl"]
+    first, second = _FakeSmtp.instances
+    assert first.transactions == []
+    assert second.logins == 1
+    assert [recipients for recipients, _ in second.transactions] == [["a@x.pl"]]
+
+
+def test_permanent_refusal_is_not_retried(monkeypatch):
+    adapter = _adapter(monkeypatch)
+    attempts = []
+
+    def refuse_c(self, sender, recipients, message):
+        attempts.append(list(recipients))
+        refused = {"c@x.pl": (550, b"no such user")}
+        if recipients == ["c@x.pl"]:
+            raise smtplib.SMTPRecipientsRefused(refused)
+        return refused
+
+    monkeypatch.setattr(_FakeSmtp, "sendmail", refuse_c)
+    monkeypatch.setattr(gmail_adapter.time, "sleep", lambda s: attempts.append(s))
+
+    failed = adapter.send_mail_many(["a@x.pl", "c@x.pl"], "Report", "<p>hi</p>")
+
+    assert failed == ["c@x.pl"]
+    assert attempts == [["a@x.pl", "c@x.pl"]]
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from handlers.filehandlers import (
     FileCommitHandler,
     FileDownloadHandler,
@@ -5,6 +8,7 @@ from handlers.filehandlers import (
     NotifyOngoingHandler,
     SaveFileLocallyHandler,
 )
+from payment_status import DUE_SOON
 
 
 class _StubDropboxClient:
@@ -20,6 +24,9 @@ class _StubDropboxClient:
     def commit_file(self, local_path: str, remote_path: str) -> None:
         self.commit_calls.append((local_path, remote_path))
 
+    def commit_file_bytes(self, data: bytes, remote_path: str) -> None:
+        self.commit_calls.append((data, remote_path))
+
 
 class _StubPushover:
     def __init__(self):
@@ -37,14 +44,16 @@ class _StubPaymentBook:
     def __init__(self, monitored_sheets):
         self.monitored_sheets = monitored_sheets
         self.payment_list = []
+        self.status = np.zeros(0, dtype=np.uint8)
+        self.changed = True
+        self.changes = {"Home": ["C2"]}
         self.loaded_with = None
 
     def load_and_process(self, file_bytes: bytes):
         self.loaded_with = file_bytes
 
-    def save_to_file(self, filename: str):
-        # Pretend to save
-        self.saved_as = filename
+    def to_bytes(self) -> bytes:
+        return b"saved-bytes"
 
 
 class _DummyPayment:
@@ -68,6 +77,8 @@ class _StubContext:
         self.excel_dropbox_path = "/remote/path.xlsx"
         self.excel_local_path = "/local/path.xlsx"
         self.file_object = None
+        self.output_bytes = None
+        self.background_writes = []
 
     @property
     def excel_file_name(self):
@@ -106,6 +117,7 @@ def test_notify_ongoing_handler_builds_payload_and_notifies():
         _DummyPaymentListItem(True),
         _DummyPaymentListItem(False),
     ]
+    ctx.payment_book.status = np.array([DUE_SOON, 0], dtype=np.uint8)
     h = NotifyOngoingHandler()
     h.set_next(_TerminalHandler())
     h.handle(ctx)
@@ -114,13 +126,15 @@ def test_notify_ongoing_handler_builds_payload_and_notifies():
     assert "Item" in ctx.pushover.notifications[0]
 
 
-def test_save_file_locally_handler_calls_book_save():
+def test_save_file_locally_handler_writes_serialized_book(tmp_path):
     ctx = _StubContext()
+    ctx.excel_local_path = str(tmp_path / "path.xlsx")
     h = SaveFileLocallyHandler()
     h.set_next(_TerminalHandler())
     out = h.handle(ctx)
     assert out is ctx
-    assert getattr(ctx.payment_book, "saved_as", None) == ctx.excel_local_path
+    assert ctx.output_bytes == b"saved-bytes"
+    assert (tmp_path / "path.xlsx").read_bytes() == b"saved-bytes"
 
 
 def test_file_commit_handler_calls_dropbox_commit():
@@ -132,3 +146,36 @@ def test_file_commit_handler_calls_dropbox_commit():
     assert ctx.dropbox_client.commit_calls == [
         (ctx.excel_local_path, ctx.excel_dropbox_path)
     ]
+
+
+def test_file_commit_handler_uploads_serialized_bytes():
+    ctx = _StubContext()
+    ctx.output_bytes = b"saved-bytes"
+    h = FileCommitHandler()
+    h.set_next(_TerminalHandler())
+    h.handle(ctx)
+    assert ctx.dropbox_client.commit_calls == [(b"saved-bytes", ctx.excel_dropbox_path)]
+
+
+def test_save_and_commit_skipped_when_book_unchanged(tmp_path):
+    ctx = _StubContext()
+    ctx.excel_local_path = str(tmp_path / "path.xlsx")
+    ctx.payment_book.changed = False
+    saver = SaveFileLocallyHandler()
+    saver.set_next(FileCommitHandler()).set_next(_TerminalHandler())
+    saver.handle(ctx)
+    assert not (tmp_path / "path.xlsx").exists()
+    assert ctx.dropbox_client.commit_calls == []
+
+
+def test_background_save_error_is_raised_on_join(tmp_path):
+    ctx = _StubContext()
+    ctx.excel_local_path = str(tmp_path / "missing" / "path.xlsx")
+    saver = SaveFileLocallyHandler()
+    saver.run_in_background = True
+    saver.set_next(_TerminalHandler())
+    saver.handle(ctx)
+
+    [write] = ctx.background_writes
+    with pytest.raises(FileNotFoundError):
+        write.join()
@@ -0,0 +1,82 @@
+import threading
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from api_clients.nju_client import NjuInvoice
+from handlers import njuhandler
+from handlers.njuhandler import NjuHandler
+
+
+class _FakeNju:
+    """Nju client whose logins only succeed when two run at the same time."""
+
+    barrier = threading.Barrier(2, timeout=5)
+
+    def __init__(self, phone_nmb, password, **services):
+        self.phone_nmb = phone_nmb
+        self.password = password
+
+    def login(self):
+        if self.password == "wrong":
+            raise ConnectionError("login failed")
+        self.barrier.wait()
+
+    def parse_html(self):
+        today = date.today()
+        return [
+            NjuInvoice(
+                phone_nmb=self.phone_nmb,
+                doc_id=f"F-{self.phone_nmb}",
+                issue_date=today,
+                due_date=today,
+                post_date=None,
+                amount_paid=0.0,
+                amount_payable=float(self.phone_nmb[-1]),
+                document_type="faktura",
+                accounting_period=f"{today:%m.%Y}",
+                status="do zapłaty",
+            )
+        ]
+
+
+class _PaymentBook:
+    def __init__(self):
+        self.updates = []
+
+    def update_current_payment(self, **kwargs):
+        self.updates.append(kwargs)
+
+
+class _Pushover:
+    def __init__(self):
+        self.errors = []
+
+    def error(self, message):
+        self.errors.append(message)
+
+
+def test_accounts_are_polled_concurrently_and_failures_isolated(monkeypatch):
+    monkeypatch.setattr(njuhandler, "Nju", _FakeNju)
+    context = SimpleNamespace(
+        nju_credentials=[
+            {"phone": "501", "password": "a", "sheet": "Home", "cat": "Nju1"},
+            {"phone": "502", "password": "wrong", "sheet": "Home", "cat": "Nju2"},
+            {"phone": "503", "password": "b", "sheet": "Home", "cat": "Nju3"},
+        ],
+        session_store=None,
+        page_archive=None,
+        parse_cache=None,
+        no_excel=False,
+        payment_book=_PaymentBook(),
+        pushover=_Pushover(),
+        statuses=[],
+    )
+
+    NjuHandler().handle(context)
+
+    updates = context.payment_book.updates
+    assert [update["category_name"] for update in updates] == ["Nju1", "Nju3"]
+    assert [update["amount"] for update in updates] == [1.0, 3.0]
+    assert updates[0]["due_date"] == datetime.combine(date.today(), datetime.min.time())
+    assert context.pushover.errors == ["Problem with nju 502"]
+    assert context.statuses[0].index("501") < context.statuses[0].index("502 - failed")
@@ -0,0 +1,90 @@
+import threading
+
+from handlers.handler import AbstractHandler
+from handlers.scheduler import Scheduler
+from run_metrics import RunMetrics
+
+
+class _RecordingBook:
+    def __init__(self):
+        self.updates = []
+
+    def update_current_payment(self, **kwargs):
+        self.updates.append(kwargs["sheet_name"])
+
+
+class _Context:
+    def __init__(self):
+        self.statuses = []
+        self.payment_book = _RecordingBook()
+        self.metrics = RunMetrics()
+
+
+class _Poller(AbstractHandler):
+    def __init__(self, name, barrier=None, delay=None):
+        self.name = name
+        self.barrier = barrier
+        self.delay = delay
+
+    def handle(self, context):
+        if self.barrier is not None:
+            # Only passes when the other poller runs at the same time
+            self.barrier.wait(timeout=5)
+        if self.delay is not None:
+            self.delay.wait(timeout=5)
+        context.payment_book.update_current_payment(sheet_name=self.name)
+        context.statuses.append(self.name)
+        return super().handle(context)
+
+    def __str__(self):
+        return self.name
+
+
+class _Stop(AbstractHandler):
+    def handle(self, context):
+        return context
+
+    def __str__(self):
+        return "stop"
+
+
+class _Reader(AbstractHandler):
+    def __init__(self):
+        self.seen = None
+
+    def handle(self, context):
+        self.seen = list(context.statuses)
+        return super().handle(context)
+
+    def __str__(self):
+        return "reader"
+
+
+def test_independent_handlers_run_concurrently_and_merge_in_order():
+    barrier = threading.Barrier(2)
+    slow_first = threading.Event()
+    scheduler = Scheduler()
+    first = scheduler.add(_Poller("first", barrier=barrier, delay=slow_first))
+    second = scheduler.add(_Poller("second", barrier=barrier))
+    reader = scheduler.add(_Reader(), after=[first, second])
+    threading.Timer(0.05, slow_first.set).start()
+
+    ctx = scheduler.run(_Context())
+
+    assert ctx.statuses == ["first", "second"]
+    assert ctx.payment_book.updates == ["first", "second"]
+    assert reader.seen == ["first", "second"]
+
+
+def test_stopped_handler_skips_dependents():
+    scheduler = Scheduler()
+    stop = scheduler.add(_Stop())
+    reader = scheduler.add(_Reader(), after=[stop])
+    scheduler.add(_Poller("other"))
+
+    ctx = scheduler.run(_Context())
+
+    assert reader.seen is None
+    assert ctx.statuses == ["other"]
+    status = {record.name: record.status for record in ctx.metrics.handlers}
+    assert status == {"stop": "stopped", "other": "ok"}
@@ -0,0 +1,222 @@
+import json
+import threading
+from datetime import date
+from email.message import Message
+from types import SimpleNamespace
+
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport
+from iprzedszkole import Iprzedszkole, parse_receivables
+
+LOGIN_PAGE = (
+    '<input name="__VIEWSTATE" value="{viewstate}"/>'
+    '<input name="__EVENTVALIDATION" value="ev"/>'
+    '<input name="__VIEWSTATEGENERATOR" value="gen"/>'
+)
+WEB_SERVICE_CALLS = ["POST pobierzDaneOplat", "POST pobierzDaneRaportRoczny"]
+MEAL_PLAN = '<select><option selected="selected" value="42">Jaś</option></select>'
+
+
+def _annual(today: date) -> dict:
+    return {
+        "d": {
+            "ListData": [
+                {
+                    "Rok": today.year,
+                    "Miesiac": today.month,
+                    "DoZaplaty": 450.0,
+                    "Zaplacono": 0.0,
+                    "Zaleglosc": 0.0,
+                    "Nadplata": 0.0,
+                }
+            ]
+        }
+    }
+
+
+DETAILS = {
+    "d": {
+        "ListK": [
+            {"RodzajOplaty": 0, "Kwota": 300.0},
+            {"RodzajOplaty": 2, "Kwota": 150.0},
+        ]
+    }
+}
+
+
+class _Portal(BaseAdapter):
+    """iPrzedszkole stand-in; web service calls must arrive together."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[str] = []
+        self.sessions: set[str] = set()
+        self.viewstate = "vs"
+        # how stale form tokens are answered: an error page or the login form
+        self.stale_status = 500
+        self.password = "secret"
+        self.barrier = threading.Barrier(2, timeout=5)
+        self.lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        path = request.url.removeprefix(Iprzedszkole.URL_BASE)
+        with self.lock:
+            self.calls.append(f"{request.method} {path.rsplit('/', 1)[-1]}")
+        cookie = request.headers.get("Cookie", "")
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        body = ""
+        if path == Iprzedszkole.URL_LOGIN and request.method == "GET":
+            body = LOGIN_PAGE.format(viewstate=self.viewstate)
+        elif path == Iprzedszkole.URL_LOGIN and (
+            f"__VIEWSTATE={self.viewstate}&" not in request.body
+        ):
+            response.status_code = self.stale_status
+            body = LOGIN_PAGE.format(viewstate=self.viewstate)
+        elif path == Iprzedszkole.URL_LOGIN and (
+            f"txtPassword={self.password}&" not in request.body
+        ):
+            body = LOGIN_PAGE.format(viewstate=self.viewstate)
+        elif path == Iprzedszkole.URL_LOGIN:
+            with self.lock:
+                sid = f"s{len(self.sessions)}"
+                self.sessions.add(sid)
+            headers = Message()
+            headers["Set-Cookie"] = f"sid={sid}; Path=/"
+            # requests reads cookies from the underlying http.client response
+            response.raw = SimpleNamespace(
+                _original_response=SimpleNamespace(msg=headers)
+            )
+            response.url = Iprzedszkole.URL_BASE + "/iprzedszkole/Pages/Start.aspx"
+        elif cookie.removeprefix("sid=") not in self.sessions:
+            response.status_code = 401
+        elif path == Iprzedszkole.URL_MEAL_PLAN:
+            body = MEAL_PLAN
+        else:
+            self.barrier.wait()
+            if path == Iprzedszkole.URL_RECEIVABLES_ANNUAL:
+                assert json.loads(request.body)["args"]["dzieckoId"] == 42
+                body = json.dumps(_annual(date.today()))
+            else:
+                body = json.dumps(DETAILS)
+        response._content = body.encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def _client(portal, store):
+    return Iprzedszkole(
+        "przedszkole",
+        "rodzic",
+        "secret",
+        session_store=store,
+        transport=Transport(backend=portal),
+    )
+
+
+def test_cached_account_needs_only_the_web_service_calls(tmp_path):
+    portal = _Portal()
+    store = SessionStore(tmp_path)
+
+    first = _client(portal, store)
+    first.login()
+    assert first.get_receivables().costs_fixed == 300.0
+    assert portal.calls[:3] == [
+        "GET login.aspx",
+        "POST login.aspx",
+        "GET Jadlospis.aspx",
+    ]
+    assert sorted(portal.calls[3:]) == WEB_SERVICE_CALLS
+
+    portal.calls.clear()
+    second = _client(portal, store)
+    second.login()
+    assert second.get_receivables().summary_to_pay == 450.0
+    assert sorted(portal.calls) == [
+        "POST pobierzDaneOplat",
+        "POST pobierzDaneRaportRoczny",
+    ]
+
+
+def test_expired_session_logs_in_with_cached_tokens_and_child(tmp_path):
+    portal = _Portal()
+    store = SessionStore(tmp_path)
+    _client(portal, store).login()
+    portal.sessions.clear()
+    portal.calls.clear()
+
+    client = _client(portal, store)
+    client.login()
+    result = client.get_receivables()
+
+    assert result.costs_meal == 150.0
+    assert portal.calls[2] == "POST login.aspx"
+    assert "GET login.aspx" not in portal.calls
+    assert "GET Jadlospis.aspx" not in portal.calls
+    assert len(portal.calls) == 5
+
+
+def test_parse_receivables_falls_back_to_latest_period():
+    annual = _annual(date(2025, 1, 1))
+    result = parse_receivables(
+        json.dumps(annual).encode(), json.dumps(DETAILS).encode(), date(2025, 3, 1)
+    )
+
+    assert result.summary_to_pay == 450.0
+    assert (result.costs_fixed, result.costs_meal, result.costs_additional) == (
+        300.0,
+        150.0,
+        0.0,
+    )
+
+
+@pytest.mark.parametrize("stale_status", [500, 200])
+def test_stale_cached_tokens_are_fetched_again(tmp_path, stale_status):
+    portal = _Portal()
+    portal.stale_status = stale_status
+    store = SessionStore(tmp_path)
+    _client(portal, store).login()
+    portal.sessions.clear()
+    portal.viewstate = "vs2"
+    portal.calls.clear()
+
+    client = _client(portal, store)
+    client.login()
+
+    assert client.get_receivables().costs_fixed == 300.0
+    assert portal.calls[2:6] == [
+        "POST login.aspx",
+        "GET login.aspx",
+        "POST login.aspx",
+        "GET Jadlospis.aspx",
+    ]
+
+
+def test_rejected_credentials_are_tried_once_with_fresh_tokens(tmp_path):
+    portal = _Portal()
+    store = SessionStore(tmp_path)
+    _client(portal, store).login()
+    portal.sessions.clear()
+    portal.password = "changed"
+    portal.calls.clear()
+
+    client = _client(portal, store)
+    client.login()
+    with pytest.raises(ConnectionError, match="rejected the credentials"):
+        client.get_receivables()
+    logins = [call for call in portal.calls if "login" in call]
+    assert logins == ["POST login.aspx", "GET login.aspx", "POST login.aspx"]
+
+    # without cached tokens there is nothing to retry
+    portal.calls.clear()
+    with pytest.raises(ConnectionError, match="rejected the credentials"):
+        _client(portal, SessionStore(tmp_path / "empty")).login()
+    assert portal.calls == ["GET login.aspx", "POST login.aspx"]
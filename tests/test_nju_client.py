@@ -0,0 +1,103 @@
+from datetime import date
+from http.cookiejar import CookieJar
+
+import requests
+from requests.adapters import BaseAdapter
+
+from api_clients.nju_client import INVOICES_URL, LOGIN_URL, POST_URL, Nju
+from api_clients.session_store import SessionStore
+from api_clients.transport import Transport
+
+
+def _row(number: int, doc: str, status: str, post_date: str = "") -> str:
+    cells = [
+        ("nr dokumentu", f'<a id="doc-{doc}" href="#">{doc}</a>'),
+        ("data wystawienia", "01.03.2025"),
+        ("termin płatności", "15.03.2025"),
+        ("data zaksięgowania", post_date),
+        ("kwota zapłacona", "10,50 zł"),
+        ("do zapłaty", "19,50 zł"),
+        ("typ dokumentu", "faktura"),
+        ("za okres", "03.2025"),
+        ("status", status),
+    ]
+    tds = "".join(
+        f'<td class="left-right-bg cell" data-title="{title}">{value}</td>'
+        for title, value in cells
+    )
+    return f'<tr id="id_abc-{number}">{tds}</tr>'
+
+
+def _client(html: str) -> Nju:
+    client = Nju("500100100", "secret")
+    client.logged_in = True
+    client.scrapped_html = html
+    return client
+
+
+def test_parse_html_reads_rows_in_order_until_gap():
+    html = (
+        "<html><body><table>"
+        + _row(2, "F2", "zapłacona", "20.03.2025")
+        + _row(1, "F1", "do zapłaty")
+        + _row(4, "F4", "do zapłaty")
+        + "</table><div>footer</div></body></html>"
+    )
+
+    invoices = _client(html).parse_html()
+
+    assert [invoice.doc_id for invoice in invoices] == ["F1", "F2"]
+    first, second = invoices
+    assert first.phone_nmb == "500100100"
+    assert first.issue_date == date(2025, 3, 1)
+    assert first.post_date is None
+    assert second.post_date == date(2025, 3, 20)
+    assert first.total() == 30.0
+    assert first.accounting_period == "03.2025"
+    assert (first.status_bool, second.status_bool) == (False, True)
+
+
+def test_parse_html_without_invoices():
+    assert _client("<html><body><p>brak</p></body></html>").parse_html() == []
+
+
+class _FailingProbeBackend(BaseAdapter):
+    """Answers the stored session probe with a server error."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls: list[str] = []
+
+    def send(self, request, **kwargs):
+        self.calls.append(f"{request.method} {request.url}")
+        response = requests.Response()
+        response.status_code = 500 if request.url == INVOICES_URL else 200
+        response.url = request.url
+        response.request = request
+        body = '<input name="_dynSessConf" value="1"/>'
+        response._content = body.encode("utf-8")
+        return response
+
+    def close(self):
+        pass
+
+
+def test_failing_stored_session_falls_back_to_login(tmp_path):
+    store = SessionStore(tmp_path)
+    store.save("nju", "500100100", "secret", CookieJar())
+    backend = _FailingProbeBackend()
+    client = Nju(
+        "500100100",
+        "secret",
+        session_store=store,
+        transport=Transport(backend=backend),
+    )
+
+    client.login()
+
+    assert client.logged_in
+    assert backend.calls == [
+        f"GET {INVOICES_URL}",
+        f"GET {LOGIN_URL}",
+        f"POST {POST_URL}",
+    ]
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from api_clients.page_archive import PageArchive
+
+
+def test_identical_pages_are_stored_once(tmp_path):
+    archive = PageArchive(tmp_path)
+
+    first = archive.store("nju/500", "<html>faktury</html>")
+    second = archive.store("nju/500", "<html>faktury</html>")
+    archive.close()
+
+    assert first == second
+    assert len(list(tmp_path.glob("*/*.gz"))) == 1
+    assert [entry["sha256"] for entry in archive.history("nju/500")] == [first] * 2
+    assert archive.load(first) == b"<html>faktury</html>"
+
+
+def test_retention_drops_old_entries_and_unreferenced_bodies(tmp_path):
+    archive = PageArchive(tmp_path, keep_per_source=2)
+
+    digests = [archive.store("enea/invoices", f"page {n}") for n in range(3)]
+    kept = archive.store("nju/500", "page 0")
+    archive.close()
+
+    assert [e["sha256"] for e in archive.history("enea/invoices")] == digests[1:]
+    # the oldest ENEA body is still referenced by the Nju entry
+    assert archive.load(kept) == b"page 0"
+
+    expiring = PageArchive(tmp_path, keep_for=timedelta(0))
+    expiring.store("enea/invoices", "page 3")
+    expiring.close()
+    assert archive.history() == []
+    assert list(tmp_path.glob("*/*.gz")) == []
@@ -0,0 +1,57 @@
+from datetime import date
+
+from api_clients.nju_client import NjuInvoice
+from api_clients.parse_cache import ParseCache, normalize
+
+
+def _invoice() -> NjuInvoice:
+    return NjuInvoice(
+        phone_nmb="500",
+        doc_id="F1",
+        issue_date=date(2025, 3, 1),
+        due_date=date(2025, 3, 15),
+        post_date=None,
+        amount_paid=0.0,
+        amount_payable=19.5,
+        document_type="faktura",
+        accounting_period="03.2025",
+        status="do zapłaty",
+    )
+
+
+def test_normalize_ignores_tokens_whitespace_and_key_order():
+    first = '<form><input type="hidden" name="_dynSessConf" value="1"/>\n<td>1</td>'
+    second = "<form><input type='hidden' name='_dynSessConf' value='2'/> <td>1</td>"
+
+    assert normalize(first) == normalize(second)
+    assert normalize('{"b": 1, "a": [2]}') == normalize(b'{"a":[2],"b":1}')
+    assert normalize("<td>1</td>") != normalize("<td>2</td>")
+
+
+def test_unchanged_page_is_not_parsed_again(tmp_path):
+    calls = []
+
+    def parse():
+        calls.append(1)
+        return [_invoice()]
+
+    assert ParseCache(tmp_path).get("nju/500", parse, "<td>1</td>") == [_invoice()]
+    assert len(calls) == 1
+
+    # a new cache instance reads the stored result of the last run
+    cache = ParseCache(tmp_path)
+    assert cache.get("nju/500", parse, "<td>1</td>\n") == [_invoice()]
+    assert len(calls) == 1
+    assert cache.get("nju/500", parse, "<td>2</td>") == [_invoice()]
+    cache.get("nju/501", parse, "<td>2</td>")
+    assert len(calls) == 3
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    ParseCache(tmp_path).get("nju/500", lambda: [_invoice()], "<td>1</td>")
+    for path in tmp_path.iterdir():
+        # a pickle of a class that no longer exists
+        path.write_bytes(b"cno_such_module\nInvoice\n.")
+
+    result = ParseCache(tmp_path).get("nju/500", lambda: [], "<td>1</td>")
+    assert result == []
@@ -50,7 +50,5 @@ class TestPayment:
         assert not payment.overdue
 
     def test_days_left(self):
-        assert True
-        # date_in_past = datetime.now() + timedelta(days=2)
-        # payment: Payment = Payment(paid=False, due_date=date_in_past, amount=10.0)
-        # assert payment.b_days_left() == 2
+        payment: Payment = Payment(paid=False, due_date=datetime.now(), amount=10.0)
+        assert payment.b_days_left == 0
@@ -1,8 +1,10 @@
 from datetime import datetime
 from io import BytesIO
 
-from openpyxl import Workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.comments import Comment
 
+import payment_sheet
 from payment_book import PaymentBook
 
 
@@ -58,3 +60,75 @@ class TestPaymentBook:
         assert item.payment.amount == new_amount
         assert item.payment.paid is True
         assert item.payment.due_date.year == new_due.year
+
+    def test_load_is_read_only_until_write(self, tmp_path):
+        data = _make_workbook_bytes()
+        book = PaymentBook(monitored_sheets={"Home": ["C"]})
+        book.load_and_process(data)
+        assert not book.loaded
+        assert len(book.payment_list) == 1
+
+        target = tmp_path / "out.xlsx"
+        book.save_to_file(filename=str(target))
+        assert book.loaded
+
+        # Formatting and next month row are applied on the writable load
+        saved = load_workbook(target)
+        ws = saved["Home"]
+        assert ws["A3"].value is not None
+        assert ws["C3"].value == 1500.0
+        assert ws["A2"].fill.fgColor.indexed == 5
+
+    def test_header_comment_read_as_icon(self):
+        wb = load_workbook(BytesIO(_make_workbook_bytes()))
+        wb["Home"]["C1"].comment = Comment("fa-home", "findog")
+        stream = BytesIO()
+        wb.save(stream)
+
+        book = PaymentBook(monitored_sheets={"Home": ["C"]})
+        book.load_and_process(stream.getvalue())
+        assert book.sheets["Home"].categories["Rent"].icon == "fa-home"
+
+    def test_payment_list_follows_store(self):
+        book = PaymentBook(monitored_sheets={"Home": ["C"]})
+        book.load_and_process(_make_workbook_bytes())
+        items = book.payment_list
+        assert items is book.payment_list
+        assert len(book.store) == 1
+        assert book.store.amount[0] == items[0].payment.amount
+        assert items[0].category is book.sheets["Home"].categories["Rent"]
+
+    def test_unchanged_after_save_round_trip(self):
+        book = PaymentBook(monitored_sheets={"Home": ["C"]})
+        book.load_and_process(_make_workbook_bytes())
+        # First run adds fills and the next month row
+        assert book.changed
+        saved = book.to_bytes()
+
+        book.load_and_process(saved)
+        assert not book.changed
+        assert not book.loaded
+
+        # Same values reported by a poller do not dirty the book
+        book.update_current_payment("Home", "Rent", amount=1500.0)
+        assert not book.changed
+
+        book.update_current_payment("Home", "Rent", amount=1600.0)
+        assert book.changes == {"Home": ["C2"]}
+        assert not book.loaded
+
+    def test_header_comment_falls_back_to_writable_workbook(self, monkeypatch):
+        wb = load_workbook(BytesIO(_make_workbook_bytes()))
+        wb["Home"]["C1"].comment = Comment("fa-home", "findog")
+        stream = BytesIO()
+        wb.save(stream)
+
+        def missing_internals(path):
+            raise AttributeError("_worksheet_path")
+
+        # simulates an openpyxl release without the private attributes
+        monkeypatch.setattr(payment_sheet, "get_rels_path", missing_internals)
+        book = PaymentBook(monitored_sheets={"Home": ["C"]})
+        book.load_and_process(stream.getvalue())
+        assert book.sheets["Home"].categories["Rent"].icon == "fa-home"
+        assert not book.loaded
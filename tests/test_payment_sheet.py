@@ -62,3 +62,19 @@ class TestPaymentSheet:
         assert ws["C3"].value == ws["C2"].value
         assert ws["D3"].value == 0
         assert ws["E3"].value is not None
+
+    def test_row_for_period(self):
+        wb = Workbook()
+        ws = wb.active
+        ws["A1"].value = "Date"
+        for offset in range(36):
+            ws.cell(row=offset + 2, column=1).value = datetime(
+                year=2020 + offset // 12, month=offset % 12 + 1, day=1
+            )
+        sheet = PaymentSheet(ws, ws.title, ["C"])
+
+        assert sheet.row_for_period(2020, 1) == 2
+        assert sheet.row_for_period(2021, 6) == 19
+        assert sheet.row_for_period(2022, 12) == 37
+        assert sheet.row_for_period(2023, 1) == -1
+        assert sheet.row_for_period(2019, 12) == -1
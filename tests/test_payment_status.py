@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from payment_status import CURRENT_MONTH, DUE_SOON, OVERDUE, PAID, classify
+from payment_store import PaymentStore
+
+
+class TestClassify:
+    def test_flags_match_payment_properties(self):
+        as_of = datetime(2025, 5, 15, 12, 0)
+        store = PaymentStore()
+        cases = [
+            (False, as_of - timedelta(days=1)),  # overdue, this month
+            (True, as_of - timedelta(days=1)),  # paid, this month
+            (False, as_of + timedelta(days=2)),  # due soon, this month
+            (False, as_of + timedelta(days=3)),  # later this month
+            (False, datetime(2025, 6, 10)),  # next month
+        ]
+        for paid, due_date in cases:
+            store.append(amount=1.0, paid=paid, due_date=due_date, excel_row=2)
+
+        status = classify(store, as_of).tolist()
+
+        assert status[0] == OVERDUE | DUE_SOON | CURRENT_MONTH
+        assert status[1] == PAID | CURRENT_MONTH
+        assert status[2] == DUE_SOON | CURRENT_MONTH
+        assert status[3] == CURRENT_MONTH
+        assert status[4] == 0
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from payment import Payment
+from payment_store import NO_CODE, PaymentStore
+
+
+class TestPaymentStore:
+    def test_append_grows_columns(self):
+        store = PaymentStore(capacity=1)
+        for i in range(5):
+            store.append(
+                amount=float(i),
+                paid=i % 2 == 0,
+                due_date=datetime(2025, i + 1, 10),
+                excel_row=i + 2,
+            )
+        assert len(store) == 5
+        assert store.amount.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+        assert store.paid.tolist() == [True, False, True, False, True]
+        assert store.excel_row.tolist() == [2, 3, 4, 5, 6]
+        assert store.sheet_code.tolist() == [NO_CODE] * 5
+
+    def test_payment_is_view_on_store_row(self):
+        store = PaymentStore()
+        index = store.append(
+            amount=10.0, paid=False, due_date=datetime(2025, 3, 10), excel_row=7
+        )
+        pmt = Payment.view(store, index)
+        assert pmt.amount == 10.0
+        assert pmt.due_date == datetime(2025, 3, 10)
+
+        pmt.paid = True
+        pmt.amount = 12.5
+        assert store.paid[index]
+        assert store.amount[index] == 12.5
@@ -0,0 +1,42 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import run_metrics
+from run_metrics import RunMetrics, count_bytes
+
+
+def test_measure_records_time_bytes_and_errors(tmp_path):
+    metrics = RunMetrics()
+    with metrics.measure("Download"):
+        count_bytes(received=2048)
+        count_bytes(sent=1024)
+    with pytest.raises(RuntimeError), metrics.measure("Enea"):
+        raise RuntimeError("portal down")
+    count_bytes(received=1)  # outside a handler: ignored
+
+    download, enea = metrics.handlers
+    assert (download.bytes_received, download.bytes_sent) == (2048, 1024)
+    assert download.status == "ok" and download.wall_s >= 0
+    assert enea.status == "error" and "portal down" in enea.error
+    assert metrics.summary().startswith("Run ")
+    assert "Download" in metrics.summary() and "(2/1 kB)" in metrics.summary()
+
+    path = metrics.save(tmp_path / "metrics")
+    record = json.loads(path.read_text(encoding="utf-8"))
+    assert [h["name"] for h in record["handlers"]] == ["Download", "Enea"]
+
+
+@pytest.mark.parametrize(
+    ("platform", "expected"), [("darwin", 2048), ("linux", 2048 * 1024)]
+)
+def test_peak_rss_in_bytes_on_every_platform(monkeypatch, platform, expected):
+    monkeypatch.setattr(run_metrics.sys, "platform", platform)
+    monkeypatch.setattr(
+        run_metrics.resource,
+        "getrusage",
+        lambda who: SimpleNamespace(ru_maxrss=2048),
+    )
+
+    assert run_metrics._peak_rss() == expected
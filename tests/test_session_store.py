@@ -0,0 +1,92 @@
+import time
+from http.cookiejar import Cookie, CookieJar
+
+from api_clients import session_store
+from api_clients.session_store import SessionStore
+
+
+def _jar(value: str, expires: int | None = None) -> CookieJar:
+    jar = CookieJar()
+    jar.set_cookie(
+        Cookie(
+            version=0,
+            name="SESSION",
+            value=value,
+            port=None,
+            port_specified=False,
+            domain="ebok.example.com",
+            domain_specified=False,
+            domain_initial_dot=False,
+            path="/",
+            path_specified=True,
+            secure=True,
+            expires=expires,
+            discard=False,
+            comment=None,
+            comment_url=None,
+            rest={"HttpOnly": None},
+        )
+    )
+    return jar
+
+
+def test_round_trip_is_encrypted_and_per_account(tmp_path):
+    store = SessionStore(tmp_path)
+    store.save("nju", "500100100", "secret-1", _jar("abc123"), meta={"id": 7})
+    store.save("nju", "500200200", "secret-2", _jar("def456"))
+
+    stored = store.load("nju", "500100100", "secret-1")
+    restored = CookieJar()
+    stored.restore(restored)
+
+    assert [c.value for c in restored] == ["abc123"]
+    assert stored.meta == {"id": 7}
+    assert [c.value for c in _restore(store.load("nju", "500200200", "secret-2"))] == [
+        "def456"
+    ]
+    for path in tmp_path.iterdir():
+        assert b"abc123" not in path.read_bytes()
+
+
+def _restore(stored) -> CookieJar:
+    jar = CookieJar()
+    stored.restore(jar)
+    return jar
+
+
+def test_unusable_sessions_are_ignored(tmp_path):
+    store = SessionStore(tmp_path, max_age=60)
+    store.save("enea", "user@example.com", "old-password", _jar("abc"))
+    assert store.load("enea", "user@example.com", "new-password") is None
+    assert store.load("enea", "other@example.com", "old-password") is None
+
+    store.save("enea", "user@example.com", "pw", _jar("abc", int(time.time()) - 1))
+    assert list(_restore(store.load("enea", "user@example.com", "pw"))) == []
+
+    expired = SessionStore(tmp_path, max_age=-1)
+    assert expired.load("enea", "user@example.com", "pw") is None
+    store.clear("enea", "user@example.com")
+    assert store.load("enea", "user@example.com", "pw") is None
+
+
+def test_key_is_derived_once_per_password(tmp_path, monkeypatch):
+    derivations = []
+    pbkdf2_hmac = session_store.hashlib.pbkdf2_hmac
+
+    def counting_pbkdf2_hmac(*args):
+        derivations.append(args)
+        return pbkdf2_hmac(*args)
+
+    monkeypatch.setattr(session_store.hashlib, "pbkdf2_hmac", counting_pbkdf2_hmac)
+    store = SessionStore(tmp_path)
+    for value in ("a", "b", "c"):
+        store.save("nju", "500100100", "secret", _jar(value))
+        assert [
+            c.value for c in _restore(store.load("nju", "500100100", "secret"))
+        ] == [value]
+    assert len(derivations) == 1
+
+    fresh = SessionStore(tmp_path)
+    fresh.load("nju", "500100100", "secret")
+    fresh.save("nju", "500100100", "secret", _jar("d"))
+    assert len(derivations) == 2
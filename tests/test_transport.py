@@ -0,0 +1,56 @@
+import requests
+from requests.adapters import BaseAdapter
+
+from api_clients.transport import DEFAULT_TIMEOUT, Transport
+from run_metrics import RunMetrics
+
+
+class _EchoBackend(BaseAdapter):
+    def __init__(self):
+        super().__init__()
+        self.timeouts = []
+
+    def send(self, request, **kwargs):
+        self.timeouts.append(kwargs.get("timeout"))
+        response = requests.Response()
+        response.status_code = 200
+        response.url = request.url
+        response.request = request
+        response._content = b"x" * 2048
+        return response
+
+    def close(self):
+        pass
+
+
+def test_sessions_share_backend_but_not_cookies():
+    backend = _EchoBackend()
+    transport = Transport(backend=backend)
+    first, second = transport.session(), transport.session({"X-Test": "1"})
+    first.cookies.set("sid", "abc")
+
+    first.get("https://a.example/one")
+    second.get("https://a.example/two", timeout=3)
+    second.post("https://b.example/", data={"k": "v"})
+
+    assert first.get_adapter("https://a.example") is backend
+    assert second.get_adapter("https://b.example") is backend
+    assert "sid" not in second.cookies
+    assert second.headers["X-Test"] == "1"
+    assert backend.timeouts == [DEFAULT_TIMEOUT, 3, DEFAULT_TIMEOUT]
+    stats = transport.stats()
+    assert stats["a.example"].requests == 2
+    assert stats["a.example"].bytes_received == 4096
+    assert stats["b.example"].bytes_sent > 0
+    assert "a.example 2 req 4 kB" in transport.summary()
+
+
+def test_traffic_is_attributed_to_the_measured_handler():
+    transport = Transport(backend=_EchoBackend())
+    metrics = RunMetrics()
+
+    with metrics.measure("Handler"):
+        transport.session().get("https://a.example/")
+
+    assert metrics.handlers[0].bytes_received == 2048
+    assert metrics.handlers[0].bytes_sent > 0
@@ -0,0 +1,18 @@
+import zipfile
+from io import BytesIO
+
+from benchmarks.workbook_generator import generate_workbook
+from payment_book import PaymentBook
+
+
+def test_generated_workbook_loads_and_keeps_vba():
+    data, monitored_sheets = generate_workbook(sheets=2, columns=3, years=1)
+    assert monitored_sheets == {"Sheet1": ["C", "F", "I"], "Sheet2": ["C", "F", "I"]}
+
+    book = PaymentBook(monitored_sheets)
+    book.load_and_process(data)
+
+    assert len(book.payment_list) == 2 * 3 * 12
+    assert book.sheets["Sheet1"].categories["Category 1"].icon == "fa-home"
+    saved = zipfile.ZipFile(BytesIO(book.to_bytes()))
+    assert "xl/vbaProject.bin" in saved.namelist()